@@ -1,8 +1,126 @@
 """
 Genetic algorithm for generating examination datesheets.
+
+Each individual is an int vector holding the exam-slot index of every entry, and the whole
+population is a 2D array so fitness, crossover and mutation run in NumPy. A day holds
+sessions_per_day sessions, and slot index = date index * sessions_per_day + session.
 """
-import random
+import bisect
 import datetime
+import heapq
+
+import numpy as np
+
+from algorithms.exam_calendar import ExamCalendar
+from algorithms.invigilation import assign_invigilators
+
+def build_conflict_graph(group_idx, course_codes, enrolment_overlaps):
+    """
+    Build the exam conflict graph in CSR form. Exams conflict if they belong to the same
+    (semester, class_section) or their courses share students; enrolment_overlaps is an
+    iterable of (course_code_a, course_code_b[, students]) pairs.
+    Returns (indptr, indices, overlap_u, overlap_v): the neighbours of exam i are
+    indices[indptr[i]:indptr[i + 1]], and overlap_u/overlap_v are the conflicting exam
+    pairs from enrolment overlap that are not already same-section pairs.
+    """
+    n = len(group_idx)
+    exams_by_code = {}
+    for i, code in enumerate(course_codes):
+        exams_by_code.setdefault(code, []).append(i)
+
+    us, vs = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    for pair in enrolment_overlaps or []:
+        exams_a, exams_b = exams_by_code.get(pair[0]), exams_by_code.get(pair[1])
+        if exams_a and exams_b:
+            us.append(np.repeat(np.array(exams_a, dtype=np.int64), len(exams_b)))
+            vs.append(np.tile(np.array(exams_b, dtype=np.int64), len(exams_a)))
+    u, v = np.concatenate(us), np.concatenate(vs)
+    keep = (u != v) & (group_idx[u] != group_idx[v])
+    keys = np.unique(np.minimum(u[keep], v[keep]) * n + np.maximum(u[keep], v[keep]))
+    overlap_u, overlap_v = keys // n, keys % n
+
+    # Same-section cliques
+    clique_u, clique_v = [overlap_u], [overlap_v]
+    order = np.argsort(group_idx, kind="stable")
+    for members in np.split(order, np.flatnonzero(np.diff(group_idx[order])) + 1):
+        if len(members) > 1:
+            a, b = np.triu_indices(len(members), 1)
+            clique_u.append(members[a])
+            clique_v.append(members[b])
+    u, v = np.concatenate(clique_u), np.concatenate(clique_v)
+
+    src, dst = np.concatenate((u, v)), np.concatenate((v, u))
+    order = np.argsort(src, kind="stable")
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(src, minlength=n))))
+    return indptr, dst[order], overlap_u, overlap_v
+
+def dsatur_colouring(indptr, indices, n_colours=None, rng=None):
+    """
+    Colour the conflict graph with DSATUR: repeatedly colour the uncoloured exam with the
+    most distinct neighbour colours (ties: higher degree, then random) with the smallest
+    free colour. When n_colours is given and all are taken by neighbours, the colour
+    least used among the neighbours is chosen. Returns a list of colours.
+    """
+    rng = rng or np.random.default_rng()
+    n = len(indptr) - 1
+    indptr, indices = indptr.tolist(), indices.tolist()
+    tie = rng.random(n).tolist()
+    colours = [-1] * n
+    saturation = [set() for _ in range(n)]
+    heap = [(0, indptr[i] - indptr[i + 1], tie[i], i) for i in range(n)]
+    heapq.heapify(heap)
+    while heap:
+        neg_saturation, neg_degree, t, i = heapq.heappop(heap)
+        if colours[i] >= 0 or -neg_saturation != len(saturation[i]):
+            continue  # Stale heap entry
+        neighbours = indices[indptr[i]:indptr[i + 1]]
+        used = saturation[i]
+        colour = 0
+        while colour in used:
+            colour += 1
+        if n_colours is not None and colour >= n_colours:
+            counts = [0] * n_colours
+            for j in neighbours:
+                if 0 <= colours[j] < n_colours:
+                    counts[colours[j]] += 1
+            colour = counts.index(min(counts))
+        colours[i] = colour
+        for j in neighbours:
+            if colours[j] < 0 and colour not in saturation[j]:
+                saturation[j].add(colour)
+                heapq.heappush(heap, (-len(saturation[j]), indptr[j] - indptr[j + 1], tie[j], j))
+    return colours
+
+def pack_rooms(sizes, room_capacities):
+    """
+    Assign the exams of one session to rooms, several small exams sharing a hall.
+
+    sizes: seats needed per exam; room_capacities: {room: seats}.
+    Best-fit decreasing: exams are placed largest first into the room with the least
+    remaining space that still fits them. An exam too large for any remaining space
+    is split over the emptiest rooms. Returns a list with the rooms of each exam
+    (empty if the session ran out of seats).
+    """
+    free = sorted((capacity, str(room)) for room, capacity in room_capacities.items() if capacity)
+    assigned = [[] for _ in sizes]
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        need = sizes[i]
+        pos = bisect.bisect_left(free, (need, ""))
+        if pos < len(free):
+            capacity, room = free.pop(pos)
+            assigned[i].append(room)
+            if capacity > need:
+                bisect.insort(free, (capacity - need, room))
+            continue
+        if sum(capacity for capacity, _ in free) < need:
+            continue
+        while need > 0:
+            capacity, room = free.pop()
+            assigned[i].append(room)
+            if capacity > need:
+                bisect.insort(free, (capacity - need, room))
+            need -= capacity
+    return assigned
 
 class DatesheetGeneticAlgorithm:
     def __init__(
@@ -15,6 +133,21 @@ class DatesheetGeneticAlgorithm:
         exam_end_time="13:00",
         exam_days=None,
         excluded_dates=None,
+        sessions_per_day=1,
+        invigilators=None,
+        max_invigilations_per_day=2,
+        enrolment_overlaps=None,
+        room_capacities=None,
+        section_sizes=None,
+        selection="tournament",
+        tournament_size=8,
+        elitism=10,
+        early_stop=True,
+        holidays=None,
+        random_seed=None,
+        extra_days=0,
+        max_extra_days=0,
+        deadline=None,
     ):
         """
         entries: list of dicts with keys 'subject', 'room', 'shift', 'semester', 'teacher', 'course_code', 'class_section'
@@ -22,6 +155,29 @@ class DatesheetGeneticAlgorithm:
         exam_start_time, exam_end_time: string HH:MM
         exam_days: list of weekdays, e.g. ["Monday", ...]
         excluded_dates: list of YYYY-MM-DD strings
+        sessions_per_day: number of equal exam sessions the exam_start_time-exam_end_time window
+            is split into (e.g. 2 for morning/afternoon papers)
+        invigilators: staff available for invigilation duty (defaults to all teachers)
+        max_invigilations_per_day: daily duty limit per invigilator
+        enrolment_overlaps: (course_code_a, course_code_b) pairs of courses sharing students
+            (electives, repeaters); their exams are never put on the same day
+        room_capacities: {room: seats}. If given, exams are not tied to their own room: rooms
+            are assigned per session by bin packing (see pack_rooms) and the GA counts the
+            exams each session's packing leaves without a room
+        section_sizes: {(semester, class_section): students}; sections of unknown size take
+            the capacity of their own room
+        selection: parent selection scheme, "tournament", "rank" or "truncation" (uniform from the top half)
+        tournament_size: individuals competing in each tournament
+        elitism: number of best individuals copied unchanged into the next generation
+        early_stop: stop as soon as a schedule without conflicts is found
+        holidays: further dates that are never exam days (e.g. from exam_calendar.load_holidays)
+        random_seed: seed of the GA's random generator (random if None), kept as self.random_seed
+        extra_days: slack exam days added to the shortest season the exams could fit in
+        max_extra_days: further days run() may add, one at a time and never past the deadline,
+            while the best schedule still has conflicts or unpacked exams; each added day
+            continues evolving the previous population (the days added are kept as self.days_added)
+        deadline: optional last allowed exam date (YYYY-MM-DD); self.meets_deadline tells
+            whether the season (last exam on self.last_exam_date) ends by it
         """
         self.entries = entries
         self.max_generations = max_generations
@@ -31,138 +187,359 @@ class DatesheetGeneticAlgorithm:
         self.exam_end_time = exam_end_time
         self.exam_days = exam_days or ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
         self.excluded_dates = set(excluded_dates or [])
+        self.calendar = ExamCalendar(self.exam_days, list(self.excluded_dates) + list(holidays if holidays is not None else []))
+        self.mutation_rate = 0.1
+        if selection not in ("tournament", "rank", "truncation"):
+            raise ValueError(f"Unknown selection scheme: {selection}")
+        self.selection = selection
+        self.tournament_size = max(int(tournament_size), 1)
+        self.elitism = max(int(elitism), 0)
+        self.early_stop = early_stop
+        self.generations_run = 0
+        self.invigilators = invigilators
+        self.max_invigilations_per_day = max_invigilations_per_day
+        self.unstaffed_sessions = []
+        self.random_seed = random_seed if random_seed is not None else int(np.random.SeedSequence().entropy % 2**32)
+        self.rng = np.random.default_rng(self.random_seed)
+        self.best_fitness = None
+        self.extra_days = max(int(extra_days), 0)
+        self.max_extra_days = max(int(max_extra_days), 0)
+        self.days_added = 0
+        self.deadline = deadline
+        self.meets_deadline = True
+        self.last_exam_date = None
+        self.sessions = self._generate_sessions(max(int(sessions_per_day), 1))
+        self.n_sessions = len(self.sessions)
+
+        # Integer encodings: group (semester, class_section) and room index of every entry,
+        # and the rank of each entry within its group (used to deal out distinct days)
+        groups = {}
+        rooms = {}
+        group_idx = []
+        room_idx = []
+        rank_idx = []
+        group_sizes = {}
+        for i, e in enumerate(self.entries):
+            g = groups.setdefault((e["semester"], e["class_section"]), len(groups))
+            group_idx.append(g)
+            # Exams without a room never clash on rooms: each gets a room index of its own
+            room_idx.append(rooms.setdefault(e["room"] or ("unassigned", i), len(rooms)))
+            rank_idx.append(group_sizes.get(g, 0))
+            group_sizes[g] = group_sizes.get(g, 0) + 1
+        self.group_idx = np.array(group_idx, dtype=np.int64)
+        self.room_idx = np.array(room_idx, dtype=np.int64)
+        self.rank_idx = np.array(rank_idx, dtype=np.int64)
+        self.n_groups = len(groups)
+        self.n_rooms = len(rooms)
+
+        # Room packing: seats needed per exam and the total capacity available per session
+        self.room_capacities = {str(r): c for r, c in (room_capacities or {}).items() if c}
+        self.unpacked_exams = []
+        if self.room_capacities:
+            section_sizes = section_sizes or {}
+            self.exam_sizes = np.array([
+                section_sizes.get((e["semester"], e["class_section"])) or self.room_capacities.get(str(e["room"]), 1)
+                for e in self.entries
+            ], dtype=np.int64)
+            self.total_capacity = sum(self.room_capacities.values())
 
-        # Prepare exam slots (dates) based on parameters
+        # Exam conflict graph; only needed beyond same-section conflicts when overlaps are given
+        self.conflict_graph = None
+        self.overlap_u = self.overlap_v = np.empty(0, dtype=np.int64)
+        if enrolment_overlaps and self.entries:
+            indptr, indices, self.overlap_u, self.overlap_v = build_conflict_graph(
+                self.group_idx, [e["course_code"] for e in self.entries], enrolment_overlaps
+            )
+            self.conflict_graph = (indptr, indices)
+
+        # Prepare exam slots (calendar day indices) based on parameters
         self.exam_slots = self._generate_exam_slots()
+        self.n_slots = len(self.exam_slots) * self.n_sessions
 
-    def _generate_exam_slots(self):
-        # Generate a list of valid exam dates (YYYY-MM-DD) based on start_date, days, and excluded_dates
-        if not self.start_date:
-            return []
-        slots = []
-        dt = datetime.datetime.strptime(self.start_date, "%Y-%m-%d")
-        needed = self._needed_exam_days()
-        while len(slots) < needed:
-            day_name = dt.strftime("%A")
-            date_str = dt.strftime("%Y-%m-%d")
-            if (
-                day_name in self.exam_days
-                and date_str not in self.excluded_dates
-            ):
-                slots.append(date_str)
-            dt += datetime.timedelta(days=1)
-        return slots
+    def _generate_sessions(self, sessions_per_day):
+        # Split the daily exam window into equal (start, end) HH:MM sessions
+        start = datetime.datetime.strptime(self.exam_start_time, "%H:%M")
+        end = datetime.datetime.strptime(self.exam_end_time, "%H:%M")
+        length = (end - start) / sessions_per_day
+        return [
+            ((start + length * i).strftime("%H:%M"), (start + length * (i + 1)).strftime("%H:%M"))
+            for i in range(sessions_per_day)
+        ]
+
+    def _generate_exam_slots(self, n_days=None):
+        # Day indices of the earliest window of valid exam dates from start_date (based on days,
+        # excluded_dates and holidays); date index i of a schedule is exam_slots[i]
+        if not self.start_date or not self.entries:
+            return np.empty(0, dtype=np.int64)
+        if n_days is None:
+            n_days = self._needed_exam_days() + self.extra_days
+        first, last, feasible = self.calendar.earliest_windows(
+            [self.start_date], [n_days], None if self.deadline is None else [self.deadline]
+        )
+        self.meets_deadline = bool(feasible[0])
+        self.last_exam_date = self.calendar.date_strings(last)[0]
+        return np.arange(first[0], last[0] + 1)
+
+    def _ends_by_deadline(self, n_days):
+        # Whether a season of n_days from start_date ends by the deadline (always, without one)
+        if self.deadline is None:
+            return True
+        return bool(self.calendar.earliest_windows([self.start_date], [n_days], [self.deadline])[2][0])
 
     def _needed_exam_days(self):
-        # One exam per day per semester/section
-        # So, for each unique (semester, class_section), count number of exams
-        sem_sec = {}
-        for e in self.entries:
-            key = (e["semester"], e["class_section"])
-            sem_sec.setdefault(key, 0)
-            sem_sec[key] += 1
-        # The max number of exams for any (semester, section)
-        return max(sem_sec.values()) if sem_sec else 0
+        # One exam per day per semester/section, and one exam per session per room
+        # So the busiest (semester, section) or room sets the number of exam days
+        if not self.entries:
+            return 0
+        section_days = int(np.bincount(self.group_idx).max())
+        if self.conflict_graph is not None and len(self.overlap_u):
+            # Students in overlapping courses need at least as many days as a DSATUR colouring uses
+            section_days = max(section_days, max(dsatur_colouring(*self.conflict_graph, rng=self.rng)) + 1)
+        if self.room_capacities:
+            room_days = -(-self._packed_session_count() // self.n_sessions)
+        else:
+            room_days = -(-int(np.bincount(self.room_idx).max()) // self.n_sessions)
+        return max(section_days, room_days)
+
+    def _packed_session_count(self):
+        # Sessions needed to seat every exam whole: first-fit decreasing of the exam sizes
+        # into sessions of total_capacity seats (an exam larger than all rooms gets a session)
+        free = []
+        for size in sorted(self.exam_sizes.tolist(), reverse=True):
+            size = min(size, self.total_capacity)
+            for i, space in enumerate(free):
+                if space >= size:
+                    free[i] -= size
+                    break
+            else:
+                free.append(self.total_capacity - size)
+        return len(free)
+
+    def _unpacked_counts(self, population):
+        """Per individual, the exams pack_rooms leaves without a room, summed over sessions"""
+        rows = np.arange(population.shape[0])[:, None]
+        demand = np.bincount(
+            (rows * self.n_slots + population).ravel(),
+            weights=np.broadcast_to(self.exam_sizes, population.shape).ravel(),
+            minlength=population.shape[0] * self.n_slots
+        ).reshape(population.shape[0], self.n_slots)
+        # Packing only runs out of seats in sessions over total capacity, so only those are packed
+        unpacked = np.zeros(population.shape[0], dtype=np.int64)
+        for row, slot in zip(*np.nonzero(demand > self.total_capacity)):
+            sizes = self.exam_sizes[population[row] == slot].tolist()
+            unpacked[row] += sum(not rooms for rooms in pack_rooms(sizes, self.room_capacities))
+        return unpacked
+
+    def _clash_counts(self, population, entity_idx, n_entities, n_values):
+        """Per individual, the number of exams sharing a value (date or slot) with an earlier exam of the same entity"""
+        rows = np.arange(population.shape[0])[:, None]
+        keys = (rows * n_entities + entity_idx) * n_values + population
+        counts = np.bincount(keys.ravel(), minlength=population.shape[0] * n_entities * n_values)
+        return np.maximum(counts - 1, 0).reshape(population.shape[0], -1).sum(axis=1)
+
+    def population_fitness(self, population):
+        """
+        Fitness of every individual (row) of the population, see calculate_fitness.
+        """
+        return self.population_scores(population)[0]
+
+    def population_scores(self, population):
+        """
+        (fitness, conflicts) arrays for every individual (row) of the population.
+        """
+        population = np.atleast_2d(population)
+        n_dates = len(self.exam_slots)
+        dates = population // self.n_sessions
+        # 1. No two exams for the same semester/section on the same day
+        conflicts = self._clash_counts(dates, self.group_idx, self.n_groups, n_dates)
+        # ... nor for courses sharing students
+        if len(self.overlap_u):
+            conflicts = conflicts + (dates[:, self.overlap_u] == dates[:, self.overlap_v]).sum(axis=1)
+        # 2. No room conflicts (each room holds one exam per session)
+        if self.room_capacities:
+            # With room packing: exams left without a room
+            conflicts = conflicts + self._unpacked_counts(population)
+        else:
+            conflicts = conflicts + self._clash_counts(population, self.room_idx, self.n_rooms, self.n_slots)
+        # 3. All exams are assigned by construction (one gene per entry)
+        # 4. Spread bonus: more unique dates used (encourage spreading)
+        rows = np.arange(population.shape[0])[:, None]
+        used = np.bincount((rows * n_dates + dates).ravel(), minlength=population.shape[0] * n_dates)
+        unique_dates = (used.reshape(population.shape[0], n_dates) > 0).sum(axis=1)
+        spread_bonus = unique_dates / (population.shape[1] or 1)
+        return (1 / (1 + conflicts)) * spread_bonus, conflicts
 
     def calculate_fitness(self, schedule):
         """
         Fitness is higher if:
-        - No two exams for the same semester/section are on the same day
-        - No room conflicts (all exams run at the same time, so each room can only have one exam per day)
-        - Each course's teacher is the invigilator (enforced by construction)
+        - No two exams for the same semester/section, or of courses sharing students, are on the same day
+        - No room conflicts (each room can only have one exam per session; with room
+          packing, every exam of a session gets seats)
+        - Invigilators are assigned after the GA (see algorithms.invigilation)
         - All exams are assigned
         """
-        conflicts = 0
-        # 1. No two exams for the same semester/section on the same day
-        sem_sec_day = {}
-        room_day = {}
-        for exam in schedule:
-            key = (exam["semester"], exam["class_section"], exam["date"])
-            if key in sem_sec_day:
-                conflicts += 1
-            sem_sec_day[key] = True
-
-            # 2. No room conflicts (all exams at same time)
-            room_key = (exam["room"], exam["date"])
-            if room_key in room_day:
-                conflicts += 1
-            room_day[room_key] = True
-
-        # 3. All exams assigned
-        missing = 0
-        if len(schedule) < len(self.entries):
-            missing = len(self.entries) - len(schedule)
-            conflicts += missing * 10
-
-        # 4. Spread bonus: more unique dates used (encourage spreading)
-        unique_dates = len(set(exam["date"] for exam in schedule))
-        spread_bonus = unique_dates / (len(schedule) or 1)
+        return float(self.population_fitness(schedule)[0])
 
-        return (1 / (1 + conflicts)) * spread_bonus
+    def _group_crossover(self, parents1, parents2):
+        """
+        Section-preserving uniform crossover of rows of parents1 and parents2: every
+        (semester, class_section) block is taken whole from one parent, so children keep
+        the one-exam-per-day structure of their parents.
+        """
+        from_first = (self.rng.random((len(parents1), self.n_groups)) < 0.5)[:, self.group_idx]
+        return np.where(from_first, parents1, parents2), np.where(from_first, parents2, parents1)
 
     def crossover(self, parent1, parent2):
-        point = random.randint(0, len(parent1) - 1)
-        child1 = parent1[:point] + parent2[point:]
-        child2 = parent2[:point] + parent1[point:]
-        return child1, child2
+        child1, child2 = self._group_crossover(parent1[None, :], parent2[None, :])
+        return child1[0], child2[0]
 
     def mutate(self, schedule):
-        mutated = [exam.copy() for exam in schedule]
-        for exam in mutated:
-            if random.random() < 0.1:
-                # Only mutate date (room is fixed per exam)
-                exam["date"] = random.choice(self.exam_slots)
+        """
+        Move random exams to random slots, swapping with the exam of the same section
+        already on that date, so a section never gets two exams on one day.
+        Only the slot is mutated (room is fixed per exam).
+        """
+        mutated = schedule.copy()
+        n_moves = self.rng.binomial(len(mutated), self.mutation_rate)
+        if not n_moves:
+            return mutated
+        # owner[group, date] = exam of that section on that date (-1 if none)
+        owner = np.full((self.n_groups, len(self.exam_slots)), -1, dtype=np.int64)
+        owner[self.group_idx, mutated // self.n_sessions] = np.arange(len(mutated))
+        exams = self.rng.integers(0, len(mutated), size=n_moves)
+        slots = self.rng.integers(0, self.n_slots, size=n_moves)
+        for exam, slot in zip(exams.tolist(), slots.tolist()):
+            group, old_slot = self.group_idx[exam], mutated[exam]
+            old_date, date = old_slot // self.n_sessions, slot // self.n_sessions
+            other = owner[group, date]
+            if other >= 0 and other != exam:
+                mutated[other] = old_slot
+            owner[group, old_date] = other if other != exam else -1
+            owner[group, date] = exam
+            mutated[exam] = slot
         return mutated
 
     def generate_initial_population(self):
         """
-        Each schedule is a list of exams, each assigned to a date (from allowed slots).
-        All exams for a given day are at the same time (enforced by output).
-        Each course's teacher is the invigilator (enforced by construction).
-        """
-        population = []
-        for _ in range(self.population_size):
-            # For each (semester, class_section), assign exams to unique days (one per day)
-            # Shuffle exams per group, assign to random available days
-            exams_by_group = {}
-            for e in self.entries:
-                key = (e["semester"], e["class_section"])
-                exams_by_group.setdefault(key, []).append(e)
-            schedule = []
-            for group, exams in exams_by_group.items():
-                days = random.sample(self.exam_slots, len(exams))
-                for exam, date in zip(exams, days):
-                    sched_exam = exam.copy()
-                    sched_exam["date"] = date
-                    sched_exam["time"] = self.exam_start_time  # All exams at same time
-                    # Teacher is invigilator (enforced by construction)
-                    schedule.append(sched_exam)
-            population.append(schedule)
-        return population
+        Each schedule is a vector of slot indices, one per entry.
+        For each (semester, class_section), exams get distinct random days: every
+        individual draws a random permutation of the days per group and entry i of a
+        group takes day perm[group][rank of i within the group], in a random session.
+        With enrolment overlaps, a quarter of the population instead comes from randomized
+        DSATUR colourings of the conflict graph (colour = day, colour labels shuffled).
+        """
+        n_dates = len(self.exam_slots)
+        perms = np.argsort(self.rng.random((self.population_size, self.n_groups, n_dates)), axis=2)
+        dates = perms[:, self.group_idx, self.rank_idx]
+        if len(self.overlap_u):
+            for row in range(max(self.population_size // 4, 1)):
+                colours = np.array(dsatur_colouring(*self.conflict_graph, n_colours=n_dates, rng=self.rng))
+                dates[row] = self.rng.permutation(n_dates)[colours]
+        sessions = self.rng.integers(0, self.n_sessions, size=(self.population_size, len(self.entries)))
+        return dates * self.n_sessions + sessions
+
+    def select_parents(self, fitness, n):
+        """Indices of n parents chosen from the scored population by the selection scheme"""
+        size = len(fitness)
+        if self.selection == "tournament":
+            entrants = self.rng.integers(0, size, size=(n, self.tournament_size))
+            return entrants[np.arange(n), np.argmax(fitness[entrants], axis=1)]
+        if self.selection == "rank":
+            # Linear ranking: the worst has weight 1, the best weight size
+            ranks = np.empty(size)
+            ranks[np.argsort(fitness, kind="stable")] = np.arange(1, size + 1)
+            return self.rng.choice(size, size=n, p=ranks / ranks.sum())
+        top = np.argsort(-fitness, kind="stable")[:max(size // 2, 1)]
+        return top[self.rng.integers(0, len(top), size=n)]
+
+    def decode(self, schedule):
+        """Turn a slot-index vector into a list of exam dicts with 'date', 'time' and 'end_time'"""
+        decoded = []
+        dates = self.calendar.date_strings(self.exam_slots)
+        for exam, slot in zip(self.entries, schedule.tolist()):
+            sched_exam = exam.copy()
+            date_idx, session = divmod(slot, self.n_sessions)
+            sched_exam["date"] = dates[date_idx]
+            sched_exam["time"], sched_exam["end_time"] = self.sessions[session]
+            decoded.append(sched_exam)
+        return decoded
+
+    def _pack_best(self, best, schedule):
+        """Pack each session's exams into rooms by capacity, updating the exams' 'room'"""
+        self.unpacked_exams = []
+        by_slot = {}
+        for i, slot in enumerate(schedule.tolist()):
+            by_slot.setdefault(slot, []).append(i)
+        for exams in by_slot.values():
+            rooms = pack_rooms(self.exam_sizes[exams].tolist(), self.room_capacities)
+            for i, exam_rooms in zip(exams, rooms):
+                best[i]["room"] = ", ".join(exam_rooms)
+                if not exam_rooms:
+                    self.unpacked_exams.append(best[i])
+        if self.unpacked_exams:
+            print(f"Warning: {len(self.unpacked_exams)} exams could not be given a room")
+
+    def _evolve(self, population=None):
+        """
+        Run the GA over the current exam slots, from population (a new initial population if
+        None); returns the final (population, fitness, conflicts).
+        """
+        # Scores are computed once per individual and kept alongside the population
+        if population is None:
+            population = self.generate_initial_population()
+        fitness, conflicts = self.population_scores(population)
+        for _ in range(self.max_generations):
+            if self.early_stop and conflicts.min() == 0:
+                break
+            self.generations_run += 1
+            elites = np.argsort(-fitness, kind="stable")[:min(self.elitism, self.population_size)]
+
+            # Section-preserving crossover of selected parent pairs, then swap mutation
+            n_children = self.population_size - len(elites)
+            n_pairs = (n_children + 1) // 2
+            parents = self.select_parents(fitness, n_pairs * 2).reshape(n_pairs, 2)
+            children = np.concatenate(self._group_crossover(population[parents[:, 0]], population[parents[:, 1]]))[:n_children]
+            children = np.array([self.mutate(child) for child in children]).reshape(children.shape)
+            child_fitness, child_conflicts = self.population_scores(children)
+
+            population = np.concatenate((population[elites], children))
+            fitness = np.concatenate((fitness[elites], child_fitness))
+            conflicts = np.concatenate((conflicts[elites], child_conflicts))
+        return population, fitness, conflicts
 
     def run(self):
-        if not self.exam_slots or not self.entries:
+        if not len(self.exam_slots) or not self.entries:
             return []
 
-        population = self.generate_initial_population()
-        for _ in range(self.max_generations):
-            scored = [(sched, self.calculate_fitness(sched)) for sched in population]
-            scored.sort(key=lambda x: x[1], reverse=True)
-            top = [sched for sched, fit in scored[:self.population_size // 2]]
-            new_pop = top.copy()
-            while len(new_pop) < self.population_size:
-                p1, p2 = random.sample(top, 2)
-                c1, c2 = self.crossover(p1, p2)
-                new_pop.append(self.mutate(c1))
-                if len(new_pop) < self.population_size:
-                    new_pop.append(self.mutate(c2))
-            population = new_pop
-
-        best = max(population, key=self.calculate_fitness)
-        # Output: add 'teacher' as invigilator, all exams at same time
-        for exam in best:
-            exam["invigilator"] = exam["teacher"]
-            exam["time"] = self.exam_start_time
-        # Sort by date, semester, section
-        best.sort(key=lambda e: (e["date"], e["semester"], e["class_section"]))
+        # Lengthen the season a day at a time while the best schedule keeps conflicts. Days are
+        # appended, so slot indices stay valid and the population carries over to the longer season
+        self.generations_run = 0
+        self.days_added = 0
+        population, fitness, conflicts = self._evolve()
+        while (
+            conflicts[np.argmax(fitness)] > 0 and self.days_added < self.max_extra_days
+            and self._ends_by_deadline(len(self.exam_slots) + 1)
+        ):
+            self.days_added += 1
+            self.exam_slots = self._generate_exam_slots(len(self.exam_slots) + 1)
+            self.n_slots = len(self.exam_slots) * self.n_sessions
+            population, fitness, conflicts = self._evolve(population)
+        print(
+            f"Datesheet GA: {self.generations_run} generations over {len(self.exam_slots)} days "
+            f"({self.days_added} added), best schedule has {int(conflicts[np.argmax(fitness)])} conflicts"
+        )
+
+        self.best_fitness = float(fitness.max())
+        best_schedule = population[np.argmax(fitness)]
+        best = self.decode(best_schedule)
+        if self.room_capacities:
+            self._pack_best(best, best_schedule)
+        # Output: spread invigilation duty over staff, one per room per session
+        self.unstaffed_sessions = assign_invigilators(
+            best, staff=self.invigilators, max_per_day=self.max_invigilations_per_day, rng=self.rng
+        )
+        if self.unstaffed_sessions:
+            print(f"Warning: {len(self.unstaffed_sessions)} exam sessions could not be given an invigilator")
+        # Sort by date, session, semester, section
+        best.sort(key=lambda e: (e["date"], e["time"], e["semester"], e["class_section"]))
         return best
@@ -0,0 +1,129 @@
+"""
+Exam calendar: valid exam dates from weekday masks and holiday calendars.
+"""
+import csv
+import datetime
+
+import numpy as np
+
+EPOCH = np.datetime64("1970-01-01", "D")
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+def _date_range(start, end):
+    """Dates from start to end inclusive as datetime64[D]"""
+    return np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+
+def load_holidays_csv(path):
+    """
+    Read holidays from a CSV file: one date (YYYY-MM-DD) per row, or a start and end
+    date (inclusive) for a break. Rows that don't start with a date (headers, notes) are skipped.
+    """
+    dates = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            try:
+                start = datetime.date.fromisoformat(row[0].strip())
+                end = datetime.date.fromisoformat(row[1].strip()) if len(row) > 1 and row[1].strip() else start
+            except (IndexError, ValueError):
+                continue
+            dates.extend(_date_range(start, end))
+    return np.array(dates, dtype="datetime64[D]")
+
+def load_holidays_ics(path):
+    """
+    Read holidays from the events of an iCalendar (.ics) file. All-day events cover
+    DTSTART up to the day before DTEND; timed events cover the day they start on.
+    """
+    with open(path, encoding="utf-8") as f:
+        # Unfold continuation lines (RFC 5545: a line starting with a space continues the previous one)
+        lines = f.read().replace("\r\n ", "").replace("\n ", "").splitlines()
+
+    def parse(value):
+        return datetime.datetime.strptime(value[:8], "%Y%m%d").date()
+
+    dates = []
+    start = end = None
+    for line in lines:
+        name, _, value = line.partition(":")
+        key = name.split(";")[0].upper()
+        if key == "BEGIN" and value.upper() == "VEVENT":
+            start = end = None
+        elif key == "DTSTART":
+            start = parse(value)
+        elif key == "DTEND" and "VALUE=DATE" in name.upper():
+            end = parse(value) - datetime.timedelta(days=1)  # All-day DTEND is exclusive
+        elif key == "END" and value.upper() == "VEVENT" and start is not None:
+            dates.extend(_date_range(start, max(end or start, start)))
+    return np.array(dates, dtype="datetime64[D]")
+
+def load_holidays(path):
+    """Load a holiday calendar from an .ics or .csv file"""
+    if path.lower().endswith(".ics"):
+        return load_holidays_ics(path)
+    return load_holidays_csv(path)
+
+class ExamCalendar:
+    """
+    Valid exam dates for the given weekdays, skipping holidays, backed by np.busdaycalendar.
+
+    exam_days: weekday names, e.g. ["Monday", ...]
+    holidays: dates (YYYY-MM-DD strings, dates or datetime64) that are never exam days
+    """
+    def __init__(self, exam_days, holidays=None):
+        weekmask = [day in exam_days for day in WEEKDAYS]
+        if not any(weekmask):
+            raise ValueError("At least one exam day of the week is required.")
+        holidays = np.array([np.datetime64(d, "D") for d in holidays or []], dtype="datetime64[D]")
+        self.busdaycalendar = np.busdaycalendar(weekmask=weekmask, holidays=holidays)
+
+    def day_indices(self, dates):
+        """
+        Integer indices of dates among the calendar's exam days, counted from 1970-01-01,
+        so consecutive exam days have consecutive indices. Dates that are not exam days
+        take the index of the next exam day.
+        """
+        rolled = np.busday_offset(np.asarray(dates, dtype="datetime64[D]"), 0, roll="forward", busdaycal=self.busdaycalendar)
+        return np.busday_count(EPOCH, rolled, busdaycal=self.busdaycalendar)
+
+    def index_dates(self, indices):
+        """The exam dates (datetime64[D]) of day indices, see day_indices"""
+        return np.busday_offset(EPOCH, np.asarray(indices, dtype=np.int64), roll="forward", busdaycal=self.busdaycalendar)
+
+    def date_strings(self, indices):
+        """The exam dates of day indices as YYYY-MM-DD strings"""
+        return [str(d) for d in np.datetime_as_string(self.index_dates(indices))]
+
+    def exam_day_indices(self, start_date, count):
+        """Day indices of the first count valid exam dates on or after start_date"""
+        return self.day_indices(start_date) + np.arange(count, dtype=np.int64)
+
+    def exam_dates(self, start_date, count):
+        """The first count valid exam dates on or after start_date, as datetime64[D]"""
+        return self.index_dates(self.exam_day_indices(start_date, count))
+
+    def is_exam_date(self, dates):
+        return np.is_busday(np.asarray(dates, dtype="datetime64[D]"), busdaycal=self.busdaycalendar)
+
+    def count_exam_dates(self, start_date, end_date):
+        """Number of valid exam dates from start_date to end_date inclusive"""
+        end = np.datetime64(end_date, "D") + 1
+        return int(np.busday_count(np.datetime64(start_date, "D"), end, busdaycal=self.busdaycalendar))
+
+    def earliest_windows(self, start_dates, needed_days, deadlines=None):
+        """
+        Earliest exam windows for several seasons at once.
+
+        start_dates: earliest start of each season; needed_days: exam days each season needs;
+        deadlines: optional last allowed date of each season.
+        Returns (first, last, feasible) arrays: the day indices (see day_indices) of the
+        first and last exam date of the earliest-finishing window and whether it ends by
+        the deadline.
+        """
+        first = self.day_indices(start_dates)
+        last = first + np.maximum(np.asarray(needed_days, dtype=np.int64), 1) - 1
+        if deadlines is None:
+            feasible = np.ones(np.shape(last), dtype=bool)
+        else:
+            # A deadline off the calendar allows exams up to the exam day before it
+            feasible = last < self.day_indices(np.asarray(deadlines, dtype="datetime64[D]") + 1)
+        return first, last, feasible
@@ -0,0 +1,66 @@
+"""
+Invigilation duty assignment for a generated datesheet.
+"""
+import heapq
+import random
+
+def exam_rooms(exam):
+    """The rooms of an exam; room packing joins the rooms of a split exam with ", " """
+    return [room.strip() for room in str(exam.get("room") or "").split(",") if room.strip()]
+
+def assign_invigilators(exams, staff=None, max_per_day=2, invigilators_per_room=1, rng=None):
+    """
+    Assign invigilators to every exam-room session of a datesheet, spreading duty evenly.
+
+    exams: list of exam dicts with 'date', 'time', 'room' and 'teacher' (output of
+    DatesheetGeneticAlgorithm.run); each gets an 'invigilator' key (names joined with ", ").
+    An exam split over several rooms needs invigilators in each of them; exams sharing a
+    room share its invigilators.
+    staff: names available for duty, defaults to every teacher in exams.
+    rng: random generator with a random() method (random.Random or numpy Generator) for
+    tie-breaks, so a seeded run reproduces its assignments; a fresh random.Random if None.
+    Nobody is given two rooms in the same session or more than max_per_day duties on a day.
+    Sessions are filled in time order by a greedy over a min-heap of (duties so far, name),
+    so each duty goes to the least loaded eligible member of staff.
+    Returns the list of (date, time, room) sessions that could not be fully staffed.
+    """
+    rng = rng or random.Random()
+    staff = sorted(set(staff if staff is not None else (e["teacher"] for e in exams if e.get("teacher"))))
+
+    # One unit of duty per room per session; exams without a room are units of their own
+    sessions = {}
+    rooms_by_exam = []
+    for i, exam in enumerate(exams):
+        keys = [(exam["date"], exam["time"], room) for room in exam_rooms(exam)] or [(exam["date"], exam["time"], ("unassigned", i))]
+        for key in keys:
+            sessions.setdefault(key, [])
+        rooms_by_exam.append(keys)
+
+    # Random tie-break so equally loaded staff share duty fairly across runs
+    heap = [(0, float(rng.random()), name) for name in staff]
+    heapq.heapify(heap)
+    busy_sessions = {}  # name -> {(date, time)}
+    daily_duties = {}  # (name, date) -> count
+    unstaffed = []
+
+    for (date, time, room) in sorted(sessions, key=lambda k: (k[0], k[1], str(k[2]))):
+        assigned = sessions[(date, time, room)]
+        skipped = []
+        while heap and len(assigned) < invigilators_per_room:
+            duties, tie, name = heapq.heappop(heap)
+            if (date, time) in busy_sessions.get(name, ()) or daily_duties.get((name, date), 0) >= max_per_day:
+                skipped.append((duties, tie, name))
+                continue
+            assigned.append(name)
+            busy_sessions.setdefault(name, set()).add((date, time))
+            daily_duties[(name, date)] = daily_duties.get((name, date), 0) + 1
+            skipped.append((duties + 1, float(rng.random()), name))
+        for item in skipped:
+            heapq.heappush(heap, item)
+
+        if len(assigned) < invigilators_per_room:
+            unstaffed.append((date, time, room if isinstance(room, str) else ""))
+
+    for exam, keys in zip(exams, rooms_by_exam):
+        exam["invigilator"] = ", ".join(name for key in keys for name in sessions[key])
+    return unstaffed
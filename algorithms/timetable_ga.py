@@ -2,8 +2,11 @@
 Genetic algorithm for generating class timetables with improved handling of teacher conflicts.
 """
 import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from tkinter import messagebox
+from pickle import PicklingError
 
 def generate_time_slots(days, start_time_str, end_time_str, lecture_duration, break_duration=0, breaks=None):
     """Generate time slots with consistent handling for all days, skipping user-defined breaks"""
@@ -39,6 +42,144 @@ def generate_time_slots(days, start_time_str, end_time_str, lecture_duration, br
 
     return slots
 
+def slots_in_window(time_slots, day, start_time_str, end_time_str):
+    """Return the time slots on the given day that overlap the window (times in "%I:%M %p" format)"""
+    window_start = datetime.strptime(start_time_str, "%I:%M %p")
+    window_end = datetime.strptime(end_time_str, "%I:%M %p")
+    result = []
+    for ts in time_slots:
+        ts_day, times = ts.split(' ', 1)
+        if ts_day != day:
+            continue
+        slot_start, slot_end = (datetime.strptime(t, "%I:%M %p") for t in times.split('-'))
+        if not (slot_end <= window_start or slot_start >= window_end):
+            result.append(ts)
+    return result
+
+def overlapping_slots(time_slots, busy_slots):
+    """Return the time slots overlapping any of busy_slots, which may come from a different slot grid"""
+    result = set()
+    for busy in busy_slots:
+        day, times = busy.split(' ', 1)
+        start, end = times.split('-')
+        result.update(slots_in_window(time_slots, day, start, end))
+    return result
+
+def is_lab_course(indicators):
+    """
+    Courses whose indicators include the word "Lab" (any case; words are separated by spaces,
+    commas or brackets, e.g. "Lab", "lab, project") need a lab room. Other indicator text does not.
+    """
+    return any(word.lower() == 'lab' for word in re.split(r'[\s,()]+', str(indicators or '')))
+
+def room_fits(info, needs_lab, section_size):
+    """Whether a room with attributes info ({'capacity', 'room_type'}, None if unknown) suits a course"""
+    if info is None:  # Unknown room attributes: accept
+        return True
+    if needs_lab != ((info.get('room_type') or 'lecture') == 'lab'):
+        return False
+    capacity = info.get('capacity')
+    return not (capacity and section_size and capacity < section_size)
+
+def find_compatible_rooms(entries, room_info=None):
+    """
+    Compatible rooms of each course block {(semester, course, section, code): [rooms]}: lab
+    courses need lab rooms, other courses lecture rooms, and the room must seat the section.
+    Candidates are the entries' own rooms and the rooms of room_info; a block without any
+    compatible room keeps its entry's room.
+    """
+    room_info = {str(room): info for room, info in (room_info or {}).items()}
+    candidate_rooms = sorted({str(e['room']) for e in entries} | set(room_info))
+    compatible = {}
+    rooms_by_requirement = {}
+    for entry in entries:
+        requirement = (is_lab_course(entry.get('course_indicators')), entry.get('section_size'))
+        if requirement not in rooms_by_requirement:
+            rooms_by_requirement[requirement] = [r for r in candidate_rooms if room_fits(room_info.get(r), *requirement)]
+        rooms = rooms_by_requirement[requirement]
+        if not rooms:
+            print(f"Warning: No compatible room for {entry['course_name']} ({entry['class_section']}), keeping room {entry['room']}")
+            rooms = [str(entry['room'])]
+        compatible[(entry['semester'], entry['course_name'], entry['class_section'], entry['course_code'])] = rooms
+    return compatible
+
+def compile_teacher_availability(time_slots, windows):
+    """
+    Compile a teacher's availability windows into slot sets.
+
+    windows: list of dicts with 'day', 'start', 'end' ("%I:%M %p") and 'status', one of
+    'available', 'preferred' or 'unavailable'. If any available or preferred windows are
+    given the teacher can only teach inside them; unavailable windows are always removed.
+    Returns (allowed_slots, preferred_slots); preferred_slots is empty if no preference was given.
+    """
+    allowed = set()
+    preferred = set()
+    unavailable = set()
+    has_windows = False
+    for window in windows:
+        slots = slots_in_window(time_slots, window['day'], window['start'], window['end'])
+        if window['status'] == 'unavailable':
+            unavailable.update(slots)
+            continue
+        has_windows = True
+        allowed.update(slots)
+        if window['status'] == 'preferred':
+            preferred.update(slots)
+    if not has_windows:
+        allowed = set(time_slots)
+    return allowed - unavailable, preferred - unavailable
+
+def find_invalid_pins(pinned_lectures, entries, time_slots, teacher_blocked_slots=None,
+                      room_blocked_slots=None, teacher_availability=None):
+    """
+    Check pinned lectures against the hard constraints they would otherwise bypass.
+    A pin is invalid if its course is no longer an entry, its slot is not one of time_slots,
+    its teacher is blocked or unavailable then, or its room is blocked then, or it shares its
+    slot's teacher, room or section with an earlier valid pin. Pins without a room use the
+    entry's room. Returns a list of (pin, reason) for the invalid pins.
+    """
+    entry_by_course = {
+        (e['semester'], e['course_name'], e['class_section'], e['course_code']): e for e in entries
+    }
+    slot_set = set(time_slots)
+    teacher_blocked_slots = teacher_blocked_slots or {}
+    room_blocked_slots = {str(r): set(slots) for r, slots in (room_blocked_slots or {}).items()}
+    allowed_by_teacher = {}
+    pinned_at = {}  # (kind, value, slot) -> course name of the valid pin holding it
+    invalid = []
+    for pin in pinned_lectures:
+        entry = entry_by_course.get((pin['semester'], pin['course_name'], pin['class_section'], pin['course_code']))
+        slot = pin['time_slot']
+        if entry is None:
+            invalid.append((pin, "the course is no longer in the timetable entries"))
+            continue
+        if slot not in slot_set:
+            invalid.append((pin, f"{slot} is not one of the generated time slots"))
+            continue
+        teacher = entry['teacher']
+        room = str(pin.get('room') or entry['room'])
+        if teacher not in allowed_by_teacher:
+            allowed, _ = compile_teacher_availability(time_slots, (teacher_availability or {}).get(teacher, []))
+            allowed_by_teacher[teacher] = allowed - set(teacher_blocked_slots.get(teacher, ()))
+        if slot not in allowed_by_teacher[teacher]:
+            invalid.append((pin, f"teacher {teacher} is blocked or unavailable at {slot}"))
+            continue
+        if slot in room_blocked_slots.get(room, ()):
+            invalid.append((pin, f"room {room} is blocked at {slot}"))
+            continue
+        keys = [
+            ("teacher", teacher, slot),
+            ("room", room, slot),
+            ("section", (entry['semester'], entry['class_section']), slot),
+        ]
+        clashes = [key for key in keys if key in pinned_at]
+        if clashes:
+            invalid.append((pin, f"clashes with pinned {pinned_at[clashes[0]]} ({'/'.join(key[0] for key in clashes)})"))
+            continue
+        for key in keys:
+            pinned_at[key] = entry['course_name']
+    return invalid
+
 class TimetableGeneticAlgorithm:
     def __init__(self,
                  *,
@@ -49,7 +190,19 @@ class TimetableGeneticAlgorithm:
                  population_size=100,
                  max_generations=150,
                  mutation_rate=0.20,
-                 breaks=None):
+                 breaks=None,
+                 seed_timetable=None,
+                 reoptimize_sections=None,
+                 patience=30,
+                 pinned_lectures=None,
+                 teacher_blocked_slots=None,
+                 room_blocked_slots=None,
+                 teacher_availability=None,
+                 max_daily_load=3,
+                 teacher_max_daily_load=None,
+                 room_info=None,
+                 teacher_committed_load=None,
+                 random_seed=None):
 
         if not entries:
             raise ValueError("No timetable entries provided to GA.")
@@ -57,11 +210,20 @@ class TimetableGeneticAlgorithm:
 
         if not time_slots_input:
             raise ValueError("No time slots provided to GA.")
-        self.unique_time_slots = list(set(time_slots_input))
+        # Seed of the run's own random stream (the random module is left alone), recorded with saved versions
+        self.random_seed = random_seed if random_seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.random_seed)
+        self.unique_time_slots = list(dict.fromkeys(time_slots_input))
+        self.time_slot_set = set(self.unique_time_slots)
 
         self.POPULATION_SIZE = population_size
         self.MAX_GENERATIONS = max_generations
         self.MUTATION_RATE = mutation_rate
+        self.PATIENCE = patience
+        self.MAX_DAILY_LOAD = max_daily_load
+        self.teacher_max_daily_load = teacher_max_daily_load or {}
+        # Lectures per teacher per day already scheduled elsewhere (e.g. another shift): {teacher: {day: count}}
+        self.teacher_committed_load = teacher_committed_load or {}
         self.LECTURES_PER_COURSE = lectures_per_course
         self.course_exceptions = course_exceptions or {}
         self.breaks = breaks or []
@@ -70,11 +232,16 @@ class TimetableGeneticAlgorithm:
         for entry in self.entries:
             entry['room'] = str(entry['room'])
 
-        # Extract unique sets
-        self.unique_rooms = list(set(e['room'] for e in self.entries))
-        self.unique_teachers = list(set(e['teacher'] for e in self.entries))
+        # Extract unique sets, sorted so a seeded run draws in the same order in every process
+        # (set order varies with string hashing)
+        self.unique_rooms = sorted(set(e['room'] for e in self.entries), key=str)
+        self.unique_teachers = sorted(set(e['teacher'] for e in self.entries), key=str)
         # Use (semester, class_section) as unique identifier
-        self.unique_semester_sections = list(set((e['semester'], e['class_section']) for e in self.entries))
+        self.unique_semester_sections = sorted(set((e['semester'], e['class_section']) for e in self.entries), key=str)
+
+        # Room attributes ({room: {'capacity', 'room_type'}}) and the compatible-room index per course
+        self.room_info = {str(room): info for room, info in (room_info or {}).items()}
+        self.compatible_rooms = find_compatible_rooms(self.entries, self.room_info)
 
         # Group time slots by day
         self.time_slots_by_day = {}
@@ -110,6 +277,48 @@ class TimetableGeneticAlgorithm:
             course_key = (entry['course_name'], entry['course_code'], entry['class_section'])
             if course_key not in self.teacher_courses[teacher]:
                 self.teacher_courses[teacher].append(course_key)
+
+        # Precomputed slot masks: the slots each teacher may be scheduled in (availability windows
+        # minus blocked slots), the slots each teacher prefers, and the slots each room is blocked
+        self.teacher_allowed_slots = {}
+        self.teacher_preferred_slots = {}
+        for teacher in self.unique_teachers:
+            allowed, preferred = compile_teacher_availability(
+                self.unique_time_slots, (teacher_availability or {}).get(teacher, [])
+            )
+            blocked = set((teacher_blocked_slots or {}).get(teacher, ()))
+            self.teacher_allowed_slots[teacher] = frozenset(allowed - blocked)
+            if preferred:
+                self.teacher_preferred_slots[teacher] = frozenset(preferred)
+        self.room_blocked_slots = {
+            str(room): frozenset(slots) for room, slots in (room_blocked_slots or {}).items()
+        }
+        self._allowed_slots_cache = {}
+
+        # Pinned lectures: placed by construction and never moved by crossover or mutation.
+        # Pins that break a blocked slot or availability are rejected: (pin, reason)
+        self.pinned_lectures = {}
+        self.pinned_slots_by_course = {}
+        self.rejected_pins = []
+        if pinned_lectures:
+            self.rejected_pins = find_invalid_pins(
+                pinned_lectures, self.entries, self.unique_time_slots,
+                teacher_blocked_slots, room_blocked_slots, teacher_availability
+            )
+            rejected = {id(pin) for pin, _ in self.rejected_pins}
+            for pin, reason in self.rejected_pins:
+                print(f"Warning: Ignoring pin for {pin['course_name']} ({pin['class_section']}) at {pin['time_slot']}: {reason}")
+            self._prepare_pinned_lectures([pin for pin in pinned_lectures if id(pin) not in rejected])
+
+        # Warm start: reuse a previously accepted timetable (same format as evolve() output)
+        self.seed_timetable = seed_timetable or {}
+        # Sections that must be re-optimized even if their entries are unchanged (repair mode)
+        self.reoptimize_sections = set(reoptimize_sections or [])
+        self.frozen_sections = set()
+        self.frozen_lectures = {}
+        self.seed_lectures = {}
+        if self.seed_timetable:
+            self._prepare_warm_start()
         
         # Debug available vs required lectures
         self.debug_timetable_requirements()
@@ -153,12 +362,11 @@ class TimetableGeneticAlgorithm:
                 print(f"  WARNING: Semester '{semester}' Section '{section}' requires {count} lectures but only {total_slots} slots available")
                 overbooked_sections.append(((semester, section), count))
         
-        # Show message box and raise exception if any section is overbooked
+        # Raise if any section is overbooked; the caller reports the error (the GA may run in a worker process)
         if overbooked_sections:
             msg = "Cannot generate timetable:\n"
             for (semester, section), count in overbooked_sections:
                 msg += f"'{semester}' '{section}' requires {count} lectures but only {total_slots} time slots are available.\n"
-            messagebox.showerror("Timetable Generation Error", msg)
             raise ValueError(msg)
 
         # Print teacher workload
@@ -169,15 +377,153 @@ class TimetableGeneticAlgorithm:
                 required = self.course_exceptions.get(course_code, self.LECTURES_PER_COURSE)
                 total_lectures += required
             print(f"  {teacher}: {len(courses)} courses, approximately {total_lectures} lectures")
+            available = len(self.teacher_allowed_slots.get(teacher, ()))
+            if available < total_lectures:
+                print(f"  WARNING: {teacher} is only available in {available} time slots")
+
+    def _pick_room(self, block, preferred_room, time_slot, room_usage):
+        """Pick a compatible room that is not blocked and preferably free at time_slot"""
+        rooms = self.compatible_rooms.get(block) or [preferred_room]
+        unblocked = [r for r in rooms if time_slot not in self.room_blocked_slots.get(r, frozenset())]
+        free = [r for r in unblocked if time_slot not in room_usage.get(r, ())]
+        if preferred_room in free:
+            return preferred_room
+        if free:
+            return self.rng.choice(free)
+        if preferred_room in unblocked or not unblocked:
+            return preferred_room
+        return self.rng.choice(unblocked)
+
+    def _allowed_slots(self, teacher, room):
+        """Slots a lecture of this teacher in this room may use (teacher mask minus room blocks)"""
+        key = (teacher, room)
+        allowed = self._allowed_slots_cache.get(key)
+        if allowed is None:
+            allowed = self.teacher_allowed_slots.get(teacher, self.time_slot_set) - self.room_blocked_slots.get(room, frozenset())
+            self._allowed_slots_cache[key] = allowed
+        return allowed
+
+    def _prepare_pinned_lectures(self, pinned_lectures):
+        """Key valid pinned lectures (see find_invalid_pins) like GA lectures, in their pinned rooms"""
+        entry_by_course = {}
+        for entry in self.entries:
+            block = (entry['semester'], entry['course_name'], entry['class_section'], entry['course_code'])
+            entry_by_course[block] = entry
+
+        pins_by_course = {}
+        for pin in pinned_lectures:
+            block = (pin['semester'], pin['course_name'], pin['class_section'], pin['course_code'])
+            # Pins saved before rooms were recorded stay in the entry's room
+            room = str(pin.get('room') or entry_by_course[block]['room'])
+            pins_by_course.setdefault(block, {})[pin['time_slot']] = room
 
-    def _create_random_timetable(self):
-        """Create a random timetable with improved teacher conflict handling"""
-        timetable = {}
+        for block, rooms_by_slot in pins_by_course.items():
+            semester, course, section, code = block
+            entry = entry_by_course[block]
+            required = self.required_lectures[(semester, section, code)]
+            slots = sorted(rooms_by_slot)[:required]
+            self.pinned_slots_by_course[block] = slots
+            for idx, time_slot in enumerate(slots):
+                self.pinned_lectures[(semester, course, section, idx, code)] = {
+                    'course_name': course,
+                    'course_code': code,
+                    'course_indicators': entry.get('course_indicators', ''),
+                    'time_slot': time_slot,
+                    'room': rooms_by_slot[time_slot],
+                    'teacher': entry['teacher'],
+                    'semester': semester,
+                    'class_section': section,
+                    'pinned': True
+                }
+
+    def _prepare_warm_start(self):
+        """Split the seed timetable into frozen sections and reusable course blocks"""
+        seed_by_course = {}
+        for key, details in self.seed_timetable.items():
+            block = (details['semester'], details['course_name'], details['class_section'], details['course_code'])
+            seed_by_course.setdefault(block, []).append(details)
+
+        entry_by_course = {}
+        for entry in self.entries:
+            block = (entry['semester'], entry['course_name'], entry['class_section'], entry['course_code'])
+            entry_by_course[block] = entry
+
+        # A course block is reusable if it still has the same teacher, lecture count and valid,
+        # unblocked slots that include all of its pins
+        changed_sections = set(self.reoptimize_sections)
+        reusable = {}
+        for block, entry in entry_by_course.items():
+            semester, course, section, code = block
+            required = self.required_lectures[(semester, section, code)]
+            seeded = seed_by_course.get(block, [])
+            pinned_slots = self.pinned_slots_by_course.get(block, [])
+            seed_slots = [d['time_slot'] for d in seeded]
+            if (len(seeded) != required
+                    or any(d['teacher'] != entry['teacher'] for d in seeded)
+                    or any(d['time_slot'] not in self._allowed_slots(d['teacher'], str(d['room'])) for d in seeded)
+                    or any(slot not in seed_slots for slot in pinned_slots)):
+                changed_sections.add((semester, section))
+                continue
+            # Pinned lectures keep their own keys; the rest of the block follows them
+            for idx in range(len(pinned_slots)):
+                key = (semester, course, section, idx, code)
+                reusable[key] = self.pinned_lectures[key]
+            others = sorted((d for d in seeded if d['time_slot'] not in pinned_slots), key=lambda d: d['time_slot'])
+            for idx, details in enumerate(others, start=len(pinned_slots)):
+                lecture = dict(details)
+                lecture['room'] = str(lecture['room'])
+                lecture['course_indicators'] = entry.get('course_indicators', '')
+                lecture.pop('pinned', None)
+                reusable[(semester, course, section, idx, code)] = lecture
+
+        # Courses dropped since the seed was accepted also count as a change to their section
+        for semester, course, section, code in seed_by_course:
+            if (semester, course, section, code) not in entry_by_course:
+                changed_sections.add((semester, section))
+
+        # Untouched sections are frozen; reusable blocks of changed sections only seed the population
+        for key, lecture in reusable.items():
+            sem_sec = (key[0], key[2])
+            if sem_sec in changed_sections:
+                self.seed_lectures[key] = lecture
+            else:
+                self.frozen_sections.add(sem_sec)
+                self.frozen_lectures[key] = lecture
+
+        print(f"Warm start: {len(self.frozen_sections)} frozen sections, "
+              f"{len(changed_sections)} sections to re-optimize")
+
+    def _is_frozen(self, details):
+        return (details['semester'], details['class_section']) in self.frozen_sections
+
+    def _is_locked(self, key, details):
+        """Frozen (warm start) and pinned lectures are never moved"""
+        return key in self.pinned_lectures or self._is_frozen(details)
+
+    def _create_random_timetable(self, fixed=None):
+        """Create a random timetable with improved teacher conflict handling.
+
+        fixed: lectures that are placed as-is (defaults to the pinned lectures and the frozen
+        lectures of a warm start); the remaining lectures are scheduled around them.
+        """
+        if fixed is None:
+            fixed = {**self.pinned_lectures, **self.frozen_lectures}
+        timetable = {key: dict(details) for key, details in fixed.items()}
         # Use (semester, section) as key
         section_time_slot_usage = {sem_sec: set() for sem_sec in self.unique_semester_sections}
         teacher_time_slot_usage = {teacher: set() for teacher in self.unique_teachers}
+        room_time_slot_usage = {}
         course_assignments = {}
 
+        # Mark slots taken by fixed lectures
+        fixed_counts = {}
+        for key, details in fixed.items():
+            block = (key[0], key[1], key[2], key[4])
+            fixed_counts[block] = fixed_counts.get(block, 0) + 1
+            room_time_slot_usage.setdefault(str(details['room']), set()).add(details['time_slot'])
+            section_time_slot_usage.setdefault((details['semester'], details['class_section']), set()).add(details['time_slot'])
+            teacher_time_slot_usage.setdefault(details['teacher'], set()).add(details['time_slot'])
+
         # Group entries by (semester, section)
         entries_by_semester_section = {}
         for entry in self.entries:
@@ -213,7 +559,7 @@ class TimetableGeneticAlgorithm:
             # Randomly shuffle the time slots to avoid bias
             # We'll use this for fallback assignment
             all_slots_shuffled = all_slots.copy()
-            random.shuffle(all_slots_shuffled)
+            self.rng.shuffle(all_slots_shuffled)
             
             # Create a second copy of slots we'll use for initial preferred time assignment
             # We'll try to assign consecutive days first when possible
@@ -242,6 +588,11 @@ class TimetableGeneticAlgorithm:
 
             # For each course in this section, assign time slots
             for course, section, code, required_lectures, teacher, entry, semester in course_info:
+                already_fixed = fixed_counts.get((semester, course, section, code), 0)
+                if already_fixed >= required_lectures:
+                    continue
+                required_lectures -= already_fixed
+                allowed = self._allowed_slots(teacher, entry['room'])
                 assigned_slots = []
                 key_prefix = (semester, course, section, code)
                 
@@ -252,7 +603,7 @@ class TimetableGeneticAlgorithm:
                         consecutive_days = []
                         for day in self.ordered_days:
                             slot_key = f"{day} {time}"
-                            if (slot_key in self.unique_time_slots
+                            if (slot_key in allowed
                                 and slot_key not in section_time_slot_usage[sem_sec]
                                 and slot_key not in teacher_time_slot_usage[teacher]):  # Check teacher availability
                                 consecutive_days.append(day)
@@ -278,7 +629,7 @@ class TimetableGeneticAlgorithm:
                         available_days = []
                         for day in self.ordered_days:
                             slot_key = f"{day} {time}"
-                            if (slot_key in self.unique_time_slots
+                            if (slot_key in allowed
                                 and slot_key not in section_time_slot_usage[sem_sec]
                                 and slot_key not in teacher_time_slot_usage[teacher]):  # Check teacher availability
                                 available_days.append(day)
@@ -297,7 +648,8 @@ class TimetableGeneticAlgorithm:
                 if len(assigned_slots) < required_lectures:
                     for day, time in all_slots_shuffled:
                         slot_key = f"{day} {time}"
-                        if (slot_key not in section_time_slot_usage[sem_sec]
+                        if (slot_key in allowed
+                            and slot_key not in section_time_slot_usage[sem_sec]
                             and slot_key not in teacher_time_slot_usage[teacher]):  # Check teacher availability
                             assigned_slots.append((day, time))
                             section_time_slot_usage[sem_sec].add(slot_key)
@@ -310,7 +662,7 @@ class TimetableGeneticAlgorithm:
                         print(f"WARNING: Teacher conflict may be unavoidable for {teacher} - {course} ({code})")
                         for day, time in all_slots_shuffled:
                             slot_key = f"{day} {time}"
-                            if slot_key not in section_time_slot_usage[sem_sec]:
+                            if slot_key in allowed and slot_key not in section_time_slot_usage[sem_sec]:
                                 assigned_slots.append((day, time))
                                 section_time_slot_usage[sem_sec].add(slot_key)
                                 # Make note of potential teacher conflict but still add it
@@ -320,15 +672,18 @@ class TimetableGeneticAlgorithm:
                                 if len(assigned_slots) == required_lectures:
                                     break
                 
-                # Create timetable entries for this course
-                for idx, (day, time) in enumerate(assigned_slots):
+                # Create timetable entries for this course, each in a compatible room
+                for idx, (day, time) in enumerate(assigned_slots, start=already_fixed):
                     key = (semester, course, section, idx, code)
+                    slot_key = f"{day} {time}"
+                    room = self._pick_room((semester, course, section, code), entry['room'], slot_key, room_time_slot_usage)
+                    room_time_slot_usage.setdefault(room, set()).add(slot_key)
                     timetable[key] = {
                         'course_name': course,
                         'course_code': code,
                         'course_indicators': entry.get('course_indicators', ''),
-                        'time_slot': f"{day} {time}",
-                        'room': entry['room'],
+                        'time_slot': slot_key,
+                        'room': room,
                         'teacher': teacher,
                         'semester': semester,
                         'class_section': section
@@ -400,7 +755,6 @@ class TimetableGeneticAlgorithm:
             msg += "\nTeacher workload summary:\n"
             for teacher, slots in teacher_timeslots.items():
                 msg += f"  {teacher}: {len(slots)} lectures assigned\n"
-            messagebox.showerror("Timetable Generation Error", msg)
             raise ValueError(msg)
         
         # Print teacher daily workload
@@ -414,7 +768,7 @@ class TimetableGeneticAlgorithm:
         print("\nTeacher daily workload:")
         for key, count in teacher_daily_load.items():
             teacher, day = key.rsplit("_", 1)
-            if count > 3:
+            if count > self.teacher_max_daily_load.get(teacher, self.MAX_DAILY_LOAD):
                 print(f"  {teacher} on {day}: {count} lectures")
 
     def calculate_fitness(self, timetable):
@@ -483,8 +837,15 @@ class TimetableGeneticAlgorithm:
             # Daily load tracking - stricter limits
             teacher_day_key = f"{teacher}_{day}"
             teacher_daily_load[teacher_day_key] = teacher_daily_load.get(teacher_day_key, 0) + 1
-            if teacher_daily_load[teacher_day_key] > 3:  # Reduced from 4 to 3
-                score += 100 * (teacher_daily_load[teacher_day_key] - 3)  # Increased penalty
+            daily_load = teacher_daily_load[teacher_day_key] + self.teacher_committed_load.get(teacher, {}).get(day, 0)
+            max_load = self.teacher_max_daily_load.get(teacher, self.MAX_DAILY_LOAD)
+            if daily_load > max_load:
+                score += 100 * (daily_load - max_load)  # Increased penalty
+
+            # Teacher preferences (soft): lectures outside preferred windows
+            preferred = self.teacher_preferred_slots.get(teacher)
+            if preferred is not None and time_slot not in preferred:
+                score += 20
 
             section_day_key = f"{semester}_{section}_{day}"
             section_daily_load[section_day_key] = section_daily_load.get(section_day_key, 0) + 1
@@ -548,7 +909,13 @@ class TimetableGeneticAlgorithm:
 
     def generate_initial_population(self):
         population = []
-        for i in range(self.POPULATION_SIZE):
+        if self.seed_timetable:
+            # Warm start: the adapted seed and mutated variants of it make up half the population
+            seeded = self._create_random_timetable(fixed={**self.frozen_lectures, **self.seed_lectures})
+            population.append(seeded)
+            while len(population) < self.POPULATION_SIZE // 2:
+                population.append(self.mutate(seeded))
+        for i in range(len(population), self.POPULATION_SIZE):
             timetable = self._create_random_timetable()
             if timetable is None:
                 print(f"Warning: Failed to create valid timetable for individual {i+1}.")
@@ -584,7 +951,7 @@ class TimetableGeneticAlgorithm:
                 p2_by_semester_section[sem_sec] = {}
             p2_by_semester_section[sem_sec][key] = details
 
-        for sem_sec in set(list(p1_by_semester_section.keys()) + list(p2_by_semester_section.keys())):
+        for sem_sec in dict.fromkeys(list(p1_by_semester_section.keys()) + list(p2_by_semester_section.keys())):
             # If section exists in only one parent, just copy it
             if sem_sec not in p1_by_semester_section:
                 child.update(p2_by_semester_section[sem_sec])
@@ -616,7 +983,7 @@ class TimetableGeneticAlgorithm:
                 p2_courses[course].append((key, details))
             
             # Choose between parent schedules for each course, preferring the one with fewer teacher conflicts
-            for course in set(list(p1_courses.keys()) + list(p2_courses.keys())):
+            for course in dict.fromkeys(list(p1_courses.keys()) + list(p2_courses.keys())):
                 # Check if both parents have this course
                 if course in p1_courses and course in p2_courses:
                     # Evaluate potential conflicts in each parent's schedule for this course
@@ -644,7 +1011,7 @@ class TimetableGeneticAlgorithm:
                         chosen_parent = p2_courses[course]
                     else:
                         # Equal conflicts, choose randomly
-                        chosen_parent = p1_courses[course] if random.random() < 0.5 else p2_courses[course]
+                        chosen_parent = p1_courses[course] if self.rng.random() < 0.5 else p2_courses[course]
                 
                 elif course in p1_courses:
                     chosen_parent = p1_courses[course]
@@ -658,6 +1025,10 @@ class TimetableGeneticAlgorithm:
                     child[new_key] = dict(details)  # Copy to avoid reference issues
                     # Update teacher usage
                     teacher_time_slot_usage[details['teacher']].add(details['time_slot'])
+
+        # Pinned lectures always keep their slot and room
+        for key, details in self.pinned_lectures.items():
+            child[key] = dict(details)
         
         return child
 
@@ -694,25 +1065,30 @@ class TimetableGeneticAlgorithm:
         # If there are teacher conflicts, prioritize mutating those
         conflict_mutations = 0
         for teacher, conflicts in teacher_conflicts.items():
-            if conflicts and random.random() < 0.8:  # High chance to fix conflicts
+            if conflicts and self.rng.random() < 0.8:  # High chance to fix conflicts
                 # Pick a random conflict to fix
-                course_key, conflict_key = random.choice(conflicts)
+                course_key, conflict_key = self.rng.choice(conflicts)
                 
-                # Decide which course to move (randomly)
-                key_to_mutate = course_key if random.random() < 0.5 else conflict_key
+                # Decide which course to move (randomly), never moving a frozen or pinned lecture
+                candidates = [k for k in (course_key, conflict_key) if not self._is_locked(k, mutated_timetable[k])]
+                if not candidates:
+                    continue
+                key_to_mutate = self.rng.choice(candidates)
                 details = mutated_timetable[key_to_mutate]
                 
-                # Find alternative time slots where this teacher is not scheduled
+                # Find alternative allowed time slots where this teacher is not scheduled
                 current_time_slot = details['time_slot']
+                allowed = self._allowed_slots(teacher, details['room'])
                 available_slots = []
                 
                 for time_slot in self.unique_time_slots:
-                    if time_slot != current_time_slot and time_slot not in teacher_time_slots[teacher]:
+                    if (time_slot != current_time_slot and time_slot in allowed
+                            and time_slot not in teacher_time_slots[teacher]):
                         available_slots.append(time_slot)
                 
                 if available_slots:
                     # Move this course to a new time slot
-                    new_time_slot = random.choice(available_slots)
+                    new_time_slot = self.rng.choice(available_slots)
                     mutated_timetable[key_to_mutate]['time_slot'] = new_time_slot
                     conflict_mutations += 1
         
@@ -730,12 +1106,22 @@ class TimetableGeneticAlgorithm:
         # Mutate whole blocks (courses) with standard probability
         for cs, keys in blocks.items():
             semester, course, section, code = cs
-            required = self.course_exceptions.get(code, self.LECTURES_PER_COURSE)
-            if random.random() < self.MUTATION_RATE:
+            if (semester, section) in self.frozen_sections:
+                continue
+            # Pinned lectures stay put; only the rest of the block is moved, and only into allowed slots
+            pinned_slots = self.pinned_slots_by_course.get(cs, [])
+            keys = [key for key in keys if key not in self.pinned_lectures]
+            if not keys:
+                continue
+            required = self.course_exceptions.get(code, self.LECTURES_PER_COURSE) - len(pinned_slots)
+            if self.rng.random() < self.MUTATION_RATE:
                 # For this course-section, we'll try new time slots
                 # First, find all possible time slots
-                possible_slots = list(self.unique_time_slots)
-                random.shuffle(possible_slots)
+                allowed = self.time_slot_set
+                for key in keys:
+                    allowed = allowed & self._allowed_slots(mutated_timetable[key]['teacher'], mutated_timetable[key]['room'])
+                possible_slots = [s for s in self.unique_time_slots if s in allowed and s not in pinned_slots]
+                self.rng.shuffle(possible_slots)
                 
                 # Get current slots for comparison
                 current_slots = [mutated_timetable[key]['time_slot'] for key in keys]
@@ -749,16 +1135,16 @@ class TimetableGeneticAlgorithm:
                     
                     if len(same_time_slots) >= required:
                         # Enough slots at same time, randomly assign
-                        random.shuffle(same_time_slots)
+                        self.rng.shuffle(same_time_slots)
                         for i, key in enumerate(keys):
                             if i < required:
                                 mutated_timetable[key]['time_slot'] = same_time_slots[i]
                 else:
                     # Try to get same time slots
-                    for time in set(slot.split(' ', 1)[1] for slot in possible_slots):
+                    for time in dict.fromkeys(slot.split(' ', 1)[1] for slot in possible_slots):
                         same_time_slots = [s for s in possible_slots if s.split(' ', 1)[1] == time]
                         if len(same_time_slots) >= required:
-                            random.shuffle(same_time_slots)
+                            self.rng.shuffle(same_time_slots)
                             for i, key in enumerate(keys):
                                 if i < required:
                                     mutated_timetable[key]['time_slot'] = same_time_slots[i]
@@ -766,8 +1152,14 @@ class TimetableGeneticAlgorithm:
         
         # Occasional room mutation
         for key, details in mutated_timetable.items():
-            if random.random() < self.MUTATION_RATE * 0.2:  # Lower chance for room mutation
-                details['room'] = random.choice(self.unique_rooms)
+            if self._is_locked(key, details):
+                continue
+            if self.rng.random() < self.MUTATION_RATE * 0.2:  # Lower chance for room mutation
+                block = (key[0], key[1], key[2], key[4])
+                rooms = [r for r in self.compatible_rooms.get(block, self.unique_rooms)
+                         if details['time_slot'] not in self.room_blocked_slots.get(r, frozenset())]
+                if rooms:
+                    details['room'] = self.rng.choice(rooms)
         
         return mutated_timetable
 
@@ -776,11 +1168,11 @@ class TimetableGeneticAlgorithm:
         tournament_size = max(3, self.POPULATION_SIZE // 10)
         
         # First tournament
-        tournament_indices = random.sample(range(len(population)), tournament_size)
+        tournament_indices = self.rng.sample(range(len(population)), tournament_size)
         parent1_idx = min(tournament_indices, key=lambda i: fitness_scores[i])
         
         # Second tournament
-        tournament_indices = random.sample(range(len(population)), tournament_size)
+        tournament_indices = self.rng.sample(range(len(population)), tournament_size)
         parent2_idx = min(tournament_indices, key=lambda i: fitness_scores[i])
         
         return population[parent1_idx], population[parent2_idx]
@@ -804,7 +1196,7 @@ class TimetableGeneticAlgorithm:
         no_improvement_count = 0
         generation = 0
         
-        while generation < self.MAX_GENERATIONS and no_improvement_count < 30:
+        while generation < self.MAX_GENERATIONS and no_improvement_count < self.PATIENCE:
             generation += 1
             
             # Create new population
@@ -821,7 +1213,7 @@ class TimetableGeneticAlgorithm:
                 child = self.crossover(parent1, parent2)
                 
                 # Mutation
-                if random.random() < self.MUTATION_RATE:
+                if self.rng.random() < self.MUTATION_RATE:
                     child = self.mutate(child)
                 
                 new_population.append(child)
@@ -934,6 +1326,278 @@ class TimetableGeneticAlgorithm:
         except ImportError:
             print("Matplotlib not available - skipping fitness plot")
 
+def find_changed_entries(entries, timetable, lectures_per_course, course_exceptions=None):
+    """
+    Return the entries whose course block differs from the given timetable: a new course,
+    another teacher or lecture count, or a room that none of the block's lectures is in.
+    """
+    course_exceptions = course_exceptions or {}
+    scheduled = {}
+    for details in timetable.values():
+        block = (details['semester'], details['course_name'], details['class_section'], details['course_code'])
+        scheduled.setdefault(block, []).append(details)
+
+    changed = []
+    for entry in entries:
+        block = (entry['semester'], entry['course_name'], entry['class_section'], entry['course_code'])
+        required = course_exceptions.get(entry['course_code'], lectures_per_course)
+        lectures = scheduled.get(block, [])
+        if (len(lectures) != required
+                or any(d['teacher'] != entry['teacher'] for d in lectures)
+                or (lectures and str(entry['room']) not in {str(d['room']) for d in lectures})):
+            changed.append(entry)
+    return changed
+
+def find_affected_sections(timetable, changed_entries, max_hops=None):
+    """
+    Find the (semester, section) pairs that need re-optimizing after changed_entries.
+
+    Starts from the sections of the changed entries and the teachers and rooms involved
+    (both the new values and the ones currently in the timetable), then adds every section
+    sharing one of those resources. Each extra hop also pulls in the other resources of the
+    newly affected sections. max_hops=None follows them to the full transitive closure;
+    max_hops=0 keeps the neighbourhood as small as possible.
+    """
+    sections_by_teacher = {}
+    sections_by_room = {}
+    resources_by_section = {}
+    current_by_course = {}
+    for details in timetable.values():
+        sem_sec = (details['semester'], details['class_section'])
+        teacher = ('teacher', details['teacher'])
+        room = ('room', str(details['room']))
+        sections_by_teacher.setdefault(teacher, set()).add(sem_sec)
+        sections_by_room.setdefault(room, set()).add(sem_sec)
+        resources_by_section.setdefault(sem_sec, set()).update((teacher, room))
+        block = (details['semester'], details['course_name'], details['class_section'], details['course_code'])
+        current_by_course.setdefault(block, set()).update((teacher, room))
+
+    affected = set()
+    resources = set()
+    for entry in changed_entries:
+        affected.add((entry['semester'], entry['class_section']))
+        resources.add(('teacher', entry['teacher']))
+        resources.add(('room', str(entry['room'])))
+        block = (entry['semester'], entry['course_name'], entry['class_section'], entry['course_code'])
+        resources.update(current_by_course.get(block, set()))
+
+    seen_resources = set()
+    hop = 0
+    while max_hops is None or hop <= max_hops:
+        hop += 1
+        new_sections = set()
+        for resource in resources - seen_resources:
+            index = sections_by_teacher if resource[0] == 'teacher' else sections_by_room
+            new_sections |= index.get(resource, set())
+        seen_resources |= resources
+        new_sections -= affected
+        affected |= new_sections
+        if not new_sections:
+            break
+        resources = set()
+        for sem_sec in new_sections:
+            resources |= resources_by_section.get(sem_sec, set())
+
+    return affected
+
+def repair_timetable(entries, time_slots, lectures_per_course, existing_timetable,
+                     changed_entries=None, course_exceptions=None, max_hops=None,
+                     population_size=30, max_generations=60, **ga_options):
+    """
+    Re-optimize only the sections affected by changed entries, keeping the rest of
+    existing_timetable pinned. If changed_entries is None they are detected by comparing
+    entries against existing_timetable. max_hops caps how far the affected neighbourhood
+    spreads (see find_affected_sections); None takes every transitively affected section.
+    Extra ga_options (pins, blocked slots) are passed to TimetableGeneticAlgorithm.
+    """
+    if changed_entries is None:
+        changed_entries = find_changed_entries(entries, existing_timetable, lectures_per_course, course_exceptions)
+    affected = find_affected_sections(existing_timetable, changed_entries, max_hops)
+    print(f"Repair: {len(changed_entries)} changed entries affect {len(affected)} sections")
+
+    ga = TimetableGeneticAlgorithm(
+        entries=entries,
+        time_slots_input=time_slots,
+        lectures_per_course=lectures_per_course,
+        course_exceptions=course_exceptions,
+        population_size=population_size,
+        max_generations=max_generations,
+        seed_timetable=existing_timetable,
+        reoptimize_sections=affected,
+        patience=10,
+        **ga_options
+    )
+    return ga.evolve()
+
+def _solve_timetable(ga_options):
+    """Build and evolve one GA from its keyword arguments (module level so worker processes can run it)"""
+    ga = TimetableGeneticAlgorithm(**ga_options)
+    return ga.evolve()
+
+def _run_parallel(jobs):
+    """Run {name: ga_options} in worker processes, falling back to in-process runs if they can't start"""
+    if len(jobs) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+                futures = {name: pool.submit(_solve_timetable, options) for name, options in jobs.items()}
+                return {name: future.result() for name, future in futures.items()}
+        except (BrokenProcessPool, PicklingError, OSError) as e:
+            print(f"Warning: Parallel run failed ({e}), running sequentially")
+    return {name: _solve_timetable(options) for name, options in jobs.items()}
+
+def find_independent_components(entries, seed_timetable=None, pinned_lectures=None, room_info=None):
+    """
+    Split entries into connected components of the section-teacher-room graph (union-find).
+    A section is linked to its teachers and to every room its courses may use (see
+    find_compatible_rooms), so sections that could share a room end up together. The rooms and
+    teachers of seeded (warm start) lectures and pinned rooms are edges too, since those
+    lectures keep them. Components share no section, teacher or usable room and can be
+    scheduled independently.
+    """
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:  # Path compression
+            parent[node], node = root, parent[node]
+        return root
+
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    compatible_rooms = find_compatible_rooms(entries, room_info)
+    for entry in entries:
+        section = ('section', entry['semester'], entry['class_section'])
+        union(section, ('teacher', entry['teacher']))
+        block = (entry['semester'], entry['course_name'], entry['class_section'], entry['course_code'])
+        for room in compatible_rooms[block]:
+            union(section, ('room', room))
+    for details in (seed_timetable or {}).values():
+        section = ('section', details['semester'], details['class_section'])
+        union(section, ('teacher', details['teacher']))
+        union(section, ('room', str(details['room'])))
+    for pin in pinned_lectures or []:
+        if pin.get('room'):
+            union(('section', pin['semester'], pin['class_section']), ('room', str(pin['room'])))
+
+    components = {}
+    for entry in entries:
+        components.setdefault(find(('section', entry['semester'], entry['class_section'])), []).append(entry)
+    return sorted(components.values(), key=len, reverse=True)
+
+def solve_decomposed(parallel=True, **ga_options):
+    """
+    Run TimetableGeneticAlgorithm(**ga_options) separately on each independent component of
+    the entries, in parallel processes, and merge the results. Each component is given every
+    room it may use (see usable_rooms) and no other component may use them, so the merged
+    timetable has no cross-component conflicts and its fitness is the sum of the component
+    fitnesses.
+    Returns (timetable, fitness) like evolve().
+    """
+    seed_timetable = ga_options.get('seed_timetable') or {}
+    pinned_lectures = ga_options.get('pinned_lectures') or []
+    components = find_independent_components(
+        ga_options['entries'], seed_timetable, pinned_lectures, ga_options.get('room_info')
+    )
+    if len(components) <= 1:
+        return _solve_timetable(ga_options)
+    print(f"Decomposed {len(ga_options['entries'])} entries into {len(components)} independent components")
+
+    jobs = {}
+    for i, component in enumerate(components):
+        sections = {(e['semester'], e['class_section']) for e in component}
+        options = dict(ga_options, entries=component)
+        if ga_options.get('random_seed') is not None:
+            options['random_seed'] = ga_options['random_seed'] + i
+        if pinned_lectures:
+            options['pinned_lectures'] = [p for p in pinned_lectures if (p['semester'], p['class_section']) in sections]
+        if seed_timetable:
+            options['seed_timetable'] = {k: d for k, d in seed_timetable.items() if (d['semester'], d['class_section']) in sections}
+        if ga_options.get('room_info'):
+            rooms = usable_rooms(options)
+            options['room_info'] = {r: info for r, info in ga_options['room_info'].items() if str(r) in rooms}
+        jobs[i] = options
+
+    results = _run_parallel(jobs) if parallel else {i: _solve_timetable(o) for i, o in jobs.items()}
+    timetable = {}
+    fitness = 0
+    for component_timetable, component_fitness in results.values():
+        if component_timetable is None:
+            return None, float('inf')
+        timetable.update(component_timetable)
+        fitness += component_fitness
+    return timetable, fitness
+
+def usable_rooms(ga_options):
+    """Rooms a GA run with these keyword arguments may book: its compatible rooms plus seeded and pinned rooms"""
+    rooms = set()
+    for block_rooms in find_compatible_rooms(ga_options['entries'], ga_options.get('room_info')).values():
+        rooms.update(block_rooms)
+    rooms.update(str(d['room']) for d in (ga_options.get('seed_timetable') or {}).values())
+    rooms.update(str(p['room']) for p in ga_options.get('pinned_lectures') or [] if p.get('room'))
+    return rooms
+
+def optimize_shifts(shift_options, parallel=True):
+    """
+    Optimize several shifts so that teachers and rooms shared between shifts never clash.
+
+    shift_options: {shift: TimetableGeneticAlgorithm keyword arguments}, in the order the shifts
+    should be solved. Shifts that share no teacher, and no usable room (see usable_rooms) in
+    overlapping slot windows, are independent and solved in parallel processes. Otherwise shifts are solved one after another
+    and each solved shift's busy teacher/room slots are blocked in the shifts that follow, with
+    its daily teacher loads counted against their daily limits.
+    Returns {shift: (timetable, fitness)}.
+    """
+    teachers = {shift: {e['teacher'] for e in o['entries']} for shift, o in shift_options.items()}
+    rooms = {shift: usable_rooms(o) for shift, o in shift_options.items()}
+    shifts = list(shift_options)
+    coupled = False
+    for i, a in enumerate(shifts):
+        for b in shifts[i + 1:]:
+            windows_overlap = bool(overlapping_slots(shift_options[a]['time_slots_input'], shift_options[b]['time_slots_input']))
+            if teachers[a] & teachers[b] or (windows_overlap and rooms[a] & rooms[b]):
+                coupled = True
+    if parallel and not coupled:
+        print(f"Shifts {shifts} share no teachers or rooms, optimizing in parallel")
+        return _run_parallel(shift_options)
+
+    # Sequential availability exchange: busy slots (in each shift's own slot grid) and daily loads so far
+    busy_teacher_slots = {}
+    busy_room_slots = {}
+    committed_load = {}
+    results = {}
+    for shift, options in shift_options.items():
+        options = dict(options)
+        time_slots = options['time_slots_input']
+        teacher_blocked = {t: set(s) for t, s in (options.get('teacher_blocked_slots') or {}).items()}
+        room_blocked = {str(r): set(s) for r, s in (options.get('room_blocked_slots') or {}).items()}
+        for teacher in teachers[shift]:
+            if teacher in busy_teacher_slots:
+                teacher_blocked.setdefault(teacher, set()).update(overlapping_slots(time_slots, busy_teacher_slots[teacher]))
+        for room in rooms[shift]:
+            if room in busy_room_slots:
+                room_blocked.setdefault(room, set()).update(overlapping_slots(time_slots, busy_room_slots[room]))
+        options['teacher_blocked_slots'] = teacher_blocked
+        options['room_blocked_slots'] = room_blocked
+        options['teacher_committed_load'] = committed_load
+        print(f"Optimizing shift {shift} with {sum(map(len, teacher_blocked.values()))} teacher slots blocked by earlier shifts")
+
+        timetable, fitness = solve_decomposed(parallel=parallel, **options)
+        results[shift] = (timetable, fitness)
+        committed_load = {t: dict(days) for t, days in committed_load.items()}
+        for details in (timetable or {}).values():
+            teacher, room, time_slot = details['teacher'], str(details['room']), details['time_slot']
+            busy_teacher_slots.setdefault(teacher, set()).add(time_slot)
+            busy_room_slots.setdefault(room, set()).add(time_slot)
+            day = time_slot.split(' ', 1)[0]
+            committed_load.setdefault(teacher, {})[day] = committed_load.get(teacher, {}).get(day, 0) + 1
+    return results
+
 def run_genetic_algorithm(entries, time_slots, lectures_per_course, course_exceptions=None):
     """Run the genetic algorithm and return the best timetable"""
     try:
@@ -959,7 +1623,6 @@ def run_genetic_algorithm(entries, time_slots, lectures_per_course, course_excep
         
         return schedule, best_fitness
     except Exception as e:
-        messagebox.showerror("Genetic Algorithm Error", f"An error occurred while generating the timetable: {str(e)}")
         print(f"Error in genetic algorithm: {str(e)}")
         return [], float('inf')
     
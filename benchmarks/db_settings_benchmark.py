@@ -0,0 +1,95 @@
+"""
+Benchmark timetable.db connection settings: SQLite's defaults against the tuned DB_SETTINGS
+of db/timetable_db.py, on the bulk save, GA load and small-commit paths.
+
+Every run uses a fresh database in a temporary directory, so timetable.db is never touched.
+Usage: python benchmarks/db_settings_benchmark.py [--entries 3000] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import timetable_db  # noqa: E402
+
+# SQLite's own defaults (2000 KiB cache, no mmap) with a rollback journal and full syncs
+DEFAULT_SETTINGS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "cache_size_kb": 2000,
+    "mmap_size": 0,
+    "temp_store": "DEFAULT",
+}
+
+def make_entries(n_entries):
+    """Synthetic timetable entries: 60 teachers, 40 rooms, 8 semesters of 5 sections, two shifts"""
+    entries = []
+    for i in range(n_entries):
+        semester = i % 8 + 1
+        entries.append({
+            "shift": "Morning" if i % 2 == 0 else "Evening",
+            "semester": f"Semester {semester}",
+            "class_section": "ABCDE"[i // 8 % 5],
+            "room": str(i % 40 + 1),
+            "teacher": f"Teacher {i % 60}",
+            "course_code": f"CS-{semester}{i % 25:02d}",
+            "course_name": f"Course {semester}-{i % 25}",
+            "indicators": "Lab" if i % 7 == 0 else "",
+        })
+    return entries
+
+def run_once(settings, entries, directory):
+    """Time each path once against a fresh database opened with settings; returns {path: seconds}"""
+    path = os.path.join(directory, f"bench_{time.perf_counter_ns()}.db")
+    timetable_db.db_path = path
+    timetable_db.DB_SETTINGS = settings
+    timetable_db.conn = timetable_db._ThreadConnections()
+    timetable_db.invalidate_id_cache()
+    timetable_db.get_connection()
+    timings = {}
+    try:
+        start = time.perf_counter()
+        timetable_db.save_timetable_entries([dict(e) for e in entries])
+        timings["bulk save (save_timetable_entries)"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        timetable_db.load_timetable_for_ga("Morning")
+        timings["load_timetable_for_ga"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(200):
+            timetable_db.fetch_id_from_name("teachers", f"New Teacher {i}")
+        timings["200 single-row commits (fetch_id_from_name)"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(50):
+            timetable_db.save_room_info(str(i % 40 + 1), 40 + i, "lecture")
+        timings["50 save_room_info updates"] = time.perf_counter() - start
+    finally:
+        timetable_db.close_db()
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=3000, help="timetable entries to save (default 3000)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per setting; the median is shown (default 5)")
+    args = parser.parse_args()
+
+    tuned_settings = dict(timetable_db.DB_SETTINGS)
+    entries = make_entries(args.entries)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, settings in (("defaults", DEFAULT_SETTINGS), ("tuned", tuned_settings)):
+            runs = [run_once(settings, entries, directory) for _ in range(max(args.repeat, 1))]
+            results[name] = {path: statistics.median(run[path] for run in runs) for path in runs[0]}
+
+    print(f"{args.entries} entries, median of {max(args.repeat, 1)} runs (defaults -> tuned)")
+    for path, seconds in results["defaults"].items():
+        print(f"- {path}: {seconds * 1000:.1f}ms -> {results['tuned'][path] * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,187 @@
 import tkinter.messagebox as messagebox
 import sqlite3
 import os
+import threading
+import json
+import sys
+import zlib
+from array import array
+from collections import Counter, namedtuple
+from contextlib import contextmanager
 
-os.chdir(os.path.dirname(__file__))
 db_path = os.path.join(os.path.dirname(__file__), 'timetable.db')
-conn = sqlite3.connect(db_path, check_same_thread=False)
-conn.execute('PRAGMA foreign_keys = ON')
 
-def init_timetable_db():
-    c = conn.cursor()
-    
-    # Create the timetable table
-    c.execute('''
+def _env_int(name, default):
+    """A non-negative integer setting from the environment; a malformed value falls back to default"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+        if number >= 0:
+            return number
+    except ValueError:
+        pass
+    print(f"Warning: ignoring {name}={value!r}, expected a non-negative integer; using {default}", file=sys.stderr)
+    return default
+
+# Connection settings, overridable through environment variables. WAL lets readers (e.g. a
+# generation worker) run while the UI writes, and with synchronous=NORMAL a commit no longer
+# waits for an fsync (only a checkpoint does); a crash can lose the last commits but never corrupts the file.
+DB_SETTINGS = {
+    "journal_mode": os.environ.get("TIMETABLE_DB_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("TIMETABLE_DB_SYNCHRONOUS", "NORMAL"),
+    "cache_size_kb": _env_int("TIMETABLE_DB_CACHE_SIZE_KB", 16384),
+    "mmap_size": _env_int("TIMETABLE_DB_MMAP_SIZE", 64 * 1024 * 1024),
+    "temp_store": os.environ.get("TIMETABLE_DB_TEMP_STORE", "MEMORY"),
+}
+
+_PRAGMA_CHOICES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "temp_store": {"DEFAULT", "FILE", "MEMORY"},
+}
+
+def connect(path=None, settings=None):
+    """
+    Open a connection to timetable.db (or path) configured with DB_SETTINGS, or with
+    settings overriding some of them. Foreign keys are always enforced.
+    """
+    settings = {**DB_SETTINGS, **(settings or {})}
+    for key, choices in _PRAGMA_CHOICES.items():
+        settings[key] = str(settings[key]).upper()
+        if settings[key] not in choices:
+            raise ValueError(f"Invalid {key} '{settings[key]}', expected one of {sorted(choices)}")
+    for key in ("cache_size_kb", "mmap_size"):
+        value = settings[key]
+        try:
+            settings[key] = int(value)
+        except (TypeError, ValueError):
+            settings[key] = -1
+        if settings[key] < 0:
+            raise ValueError(f"Invalid {key} {value!r}, expected a non-negative integer")
+
+    connection = sqlite3.connect(path or db_path, check_same_thread=False)
+    connection.execute('PRAGMA foreign_keys = ON')
+    connection.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+    connection.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    connection.execute(f"PRAGMA cache_size = {-settings['cache_size_kb']}")  # Negative: size in KiB
+    connection.execute(f"PRAGMA mmap_size = {settings['mmap_size']}")
+    connection.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+    return connection
+
+class _ThreadConnections:
+    """
+    One connection per thread, opened on first use, so the UI, generation workers and
+    export jobs never share a handle. Exposes the sqlite3.Connection methods of the calling
+    thread's connection, so `conn.cursor()` works unchanged from any thread.
+    Importing the module opens nothing; the first connection also brings the schema up to date
+    and loads the identity cache (retried on the next use if that fails). Connections of
+    threads that have finished are closed whenever another thread opens one.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._migration_lock = threading.Lock()
+        self._migrated = False
+        self._all = []  # (thread, connection)
+
+    def get(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = connect()
+            self._local.connection = connection
+            self._local.depth = 0
+            with self._lock:
+                alive = []
+                for thread, other in self._all:
+                    if thread.is_alive():
+                        alive.append((thread, other))
+                    else:
+                        other.close()
+                self._all = alive + [(threading.current_thread(), connection)]
+        # Migrating uses this connection too, so the migrating thread skips the check
+        if not self._migrated and not getattr(self._local, "migrating", False):
+            with self._migration_lock:
+                if not self._migrated:
+                    self._local.migrating = True
+                    try:
+                        migrate_timetable_db()
+                        _load_id_cache()
+                        self._migrated = True
+                    finally:
+                        self._local.migrating = False
+        return connection
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def close_all(self):
+        with self._lock:
+            for _, connection in self._all:
+                connection.close()
+            self._all.clear()
+        self._local = threading.local()
+
+conn = _ThreadConnections()
+
+def get_connection():
+    """Return the calling thread's connection to timetable.db."""
+    return conn.get()
+
+@contextmanager
+def transaction():
+    """
+    Run a block in one write transaction on the calling thread's connection and yield a cursor:
+    committed when the block ends, rolled back if it raises. Nested blocks run in a SAVEPOINT
+    of the outer transaction, so a failed inner block is undone even if the caller catches its
+    error and the outer block commits. BEGIN IMMEDIATE takes the write lock up front, so
+    concurrent writers wait for each other instead of failing part-way with SQLITE_BUSY.
+    """
+    connection = conn.get()
+    local = conn._local
+    depth = local.depth
+    savepoint = f"transaction_{depth}"
+    if depth:
+        connection.execute(f"SAVEPOINT {savepoint}")
+    elif not connection.in_transaction:
+        connection.execute("BEGIN IMMEDIATE")
+    local.depth += 1
+    try:
+        yield connection.cursor()
+    except BaseException:
+        local.depth -= 1
+        if depth:
+            connection.execute(f"ROLLBACK TO {savepoint}")
+            connection.execute(f"RELEASE {savepoint}")
+        else:
+            connection.rollback()
+        raise
+    local.depth -= 1
+    if depth:
+        connection.execute(f"RELEASE {savepoint}")
+    else:
+        connection.commit()
+
+def _table_columns(cur, table):
+    cur.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cur.fetchall()]
+
+def _add_room_and_section_attributes(cur):
+    # Databases from before the migration runner may already have these columns
+    rooms = _table_columns(cur, "rooms")
+    if "capacity" not in rooms:
+        cur.execute("ALTER TABLE rooms ADD COLUMN capacity INTEGER")
+    if "room_type" not in rooms:
+        cur.execute("ALTER TABLE rooms ADD COLUMN room_type TEXT NOT NULL DEFAULT 'lecture'")  # 'lecture' or 'lab'
+    if "strength" not in _table_columns(cur, "class_sections"):
+        cur.execute("ALTER TABLE class_sections ADD COLUMN strength INTEGER")  # Number of students
+
+# Ordered schema migrations: (version, description, SQL statements or a function taking a cursor).
+# Append new steps with the next version number; never edit a step that has been released.
+MIGRATIONS = [
+    (1, "timetable, teachers, courses, rooms and class_sections tables", [
+        '''
         CREATE TABLE IF NOT EXISTS timetable (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             teacher_id INTEGER NOT NULL,
@@ -25,18 +195,14 @@ def init_timetable_db():
             FOREIGN KEY (room_id) REFERENCES rooms (id),
             FOREIGN KEY (class_section_id) REFERENCES class_sections (id)
         )
-    ''')
-    
-    # Create the teachers table (no change)
-    c.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS teachers (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL UNIQUE
         )
-    ''')
-    
-    # Create the courses table (no change regarding semester here)
-    c.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS courses (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
@@ -46,18 +212,14 @@ def init_timetable_db():
             FOREIGN KEY (teacher_id) REFERENCES teachers (id),
             UNIQUE(name, code, teacher_id)
         )
-    ''')
-    
-    # Create the rooms table (no change)
-    c.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS rooms (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name INTEGER NOT NULL UNIQUE 
+            name INTEGER NOT NULL UNIQUE
         )
-    ''')
-    
-    # Create the class_sections table
-    c.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS class_sections (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
@@ -65,10 +227,162 @@ def init_timetable_db():
             shift TEXT NOT NULL,
             UNIQUE(name, semester, shift)   
         )
-    ''')
+        '''
+    ]),
+    (2, "room capacity and type, class section strength", _add_room_and_section_attributes),
+    (3, "accepted_timetable and pinned_lectures tables", [
+        # Last timetable the user accepted, per shift
+        '''
+        CREATE TABLE IF NOT EXISTS accepted_timetable (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            shift TEXT NOT NULL,
+            semester TEXT NOT NULL,
+            class_section TEXT NOT NULL,
+            course_name TEXT NOT NULL,
+            course_code TEXT NOT NULL,
+            course_indicators TEXT,
+            teacher TEXT NOT NULL,
+            room TEXT NOT NULL,
+            time_slot TEXT NOT NULL,
+            accepted_at TEXT NOT NULL
+        )
+        ''',
+        # Lectures fixed to a slot by the user, per shift
+        '''
+        CREATE TABLE IF NOT EXISTS pinned_lectures (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            shift TEXT NOT NULL,
+            semester TEXT NOT NULL,
+            class_section TEXT NOT NULL,
+            course_name TEXT NOT NULL,
+            course_code TEXT NOT NULL,
+            time_slot TEXT NOT NULL,
+            UNIQUE(shift, semester, class_section, course_name, course_code, time_slot)
+        )
+        '''
+    ]),
+    (4, "teacher_availability and teacher_preferences tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS teacher_availability (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            teacher_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            start_time TEXT NOT NULL,  -- "hh:mm AM/PM"
+            end_time TEXT NOT NULL,
+            status TEXT NOT NULL CHECK (status IN ('available', 'preferred', 'unavailable')),
+            FOREIGN KEY (teacher_id) REFERENCES teachers (id) ON DELETE CASCADE
+        )
+        ''',
+        # Per-teacher load limits
+        '''
+        CREATE TABLE IF NOT EXISTS teacher_preferences (
+            teacher_id INTEGER PRIMARY KEY,
+            max_daily_lectures INTEGER,
+            FOREIGN KEY (teacher_id) REFERENCES teachers (id) ON DELETE CASCADE
+        )
+        '''
+    ]),
+    # idx_timetable_shift covers the shift/semester filtered loads (every timetable column they
+    # read is in it); the foreign key indexes keep deletes from the parent tables from scanning
+    # the children (see tests/test_query_plans.py)
+    (5, "indexes for the load and delete paths", [
+        "CREATE INDEX IF NOT EXISTS idx_timetable_shift ON timetable (shift, semester, class_section_id, course_id, teacher_id, room_id)",
+        "CREATE INDEX IF NOT EXISTS idx_timetable_teacher ON timetable (teacher_id)",
+        "CREATE INDEX IF NOT EXISTS idx_timetable_course ON timetable (course_id)",
+        "CREATE INDEX IF NOT EXISTS idx_timetable_room ON timetable (room_id)",
+        "CREATE INDEX IF NOT EXISTS idx_courses_teacher ON courses (teacher_id)",
+        "CREATE INDEX IF NOT EXISTS idx_teacher_availability_teacher ON teacher_availability (teacher_id)",
+        "CREATE INDEX IF NOT EXISTS idx_accepted_timetable_shift ON accepted_timetable (shift)"
+    ]),
+    # Every generated timetable/datesheet; assignments are encoded by _encode_assignments
+    (6, "schedule_versions table", [
+        '''
+        CREATE TABLE IF NOT EXISTS schedule_versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL CHECK (kind IN ('timetable', 'datesheet')),
+            shift TEXT,  -- NULL for datesheets and multi-shift runs
+            label TEXT,
+            params TEXT NOT NULL,  -- JSON generation parameters
+            random_seed INTEGER,
+            fitness REAL,
+            n_assignments INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            assignments BLOB NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_schedule_versions_kind ON schedule_versions (kind, shift, created_at)"
+    ]),
+    # The room a lecture is pinned to; NULL for pins saved before rooms were recorded
+    (7, "room column for pinned_lectures", [
+        "ALTER TABLE pinned_lectures ADD COLUMN room TEXT"
+    ]),
+]
 
-def fetch_id_from_name(table, name, **kwargs):
+def get_schema_version():
+    """Return the version of the newest migration applied to the database (0 if none)."""
     cur = conn.cursor()
+    cur.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, description TEXT, applied_at TEXT NOT NULL)")
+    cur.execute("SELECT MAX(version) FROM schema_version")
+    return cur.fetchone()[0] or 0
+
+def migrate_timetable_db():
+    """
+    Apply the pending MIGRATIONS in order, each in its own transaction together with its
+    schema_version row, so an interrupted upgrade resumes from the last completed step.
+    A database that is already current costs one query. Returns the resulting schema version.
+    """
+    from datetime import datetime
+    version = get_schema_version()
+    for step_version, description, step in MIGRATIONS:
+        if step_version <= version:
+            continue
+        with transaction() as cur:
+            # Another process may have applied the step while this one waited for the write lock
+            cur.execute("SELECT MAX(version) FROM schema_version")
+            if (cur.fetchone()[0] or 0) < step_version:
+                if callable(step):
+                    step(cur)
+                else:
+                    for statement in step:
+                        cur.execute(statement)
+                cur.execute(
+                    "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                    (step_version, description, datetime.now().isoformat(timespec="seconds"))
+                )
+        version = step_version
+    return version
+
+def init_timetable_db():
+    migrate_timetable_db()
+
+# Write-through identity cache of the dimension tables, loaded in one query when the first
+# connection has migrated the schema (and again on the next lookup after invalidation):
+# {"teachers": {name: id}, "courses": {(name, code, teacher_id): id},
+#  "rooms": {room number: id}, "class_sections": {(name, semester, shift): id}}
+_id_cache = None
+
+LOAD_ID_CACHE_QUERY = """
+    SELECT 'teachers', id, name, NULL, NULL FROM teachers
+    UNION ALL SELECT 'courses', id, name, code, teacher_id FROM courses
+    UNION ALL SELECT 'rooms', id, name, NULL, NULL FROM rooms
+    UNION ALL SELECT 'class_sections', id, name, semester, shift FROM class_sections
+"""
+
+def _load_id_cache():
+    global _id_cache
+    cache = {"teachers": {}, "courses": {}, "rooms": {}, "class_sections": {}}
+    for table, row_id, name, a, b in conn.cursor().execute(LOAD_ID_CACHE_QUERY):
+        cache[table][name if table in ("teachers", "rooms") else (name, a, b)] = row_id
+    _id_cache = cache
+    return _id_cache
+
+def invalidate_id_cache():
+    """Drop the cached dimension ids; call after changing those tables outside this module."""
+    global _id_cache
+    _id_cache = None
+
+def fetch_id_from_name(table, name, **kwargs):
+    cache = _id_cache if _id_cache is not None else _load_id_cache()
     try:
         if table == "rooms":
             # ... (no change from previous version for rooms)
@@ -76,15 +390,13 @@ def fetch_id_from_name(table, name, **kwargs):
                 room_name_val = int(name)
                 if room_name_val <= 0:
                     raise ValueError
-                query = "SELECT id FROM rooms WHERE name = ?"
-                params = (room_name_val,)
+                key = room_name_val
             except ValueError:
                 messagebox.showerror("Invalid Room", "Room must be a positive integer.")
                 return None
         elif table == "teachers":
             # ... (no change for teachers)
-            query = "SELECT id FROM teachers WHERE name = ?"
-            params = (name,)
+            key = name
         elif table == "courses":
             # ... (no change for courses from previous version)
             teacher_id = kwargs.get("teacher_id")
@@ -93,39 +405,35 @@ def fetch_id_from_name(table, name, **kwargs):
             if not teacher_id or not code:
                 messagebox.showerror("Missing Data", "Teacher ID and Course Code are required for courses.")
                 return None
-            query = "SELECT id FROM courses WHERE name = ? AND teacher_id = ? AND code = ?"
-            params = (name, teacher_id, code)
+            key = (name, code, teacher_id)
         elif table == "class_sections":
             semester_text = kwargs.get("semester") # Semester is now TEXT
             shift = kwargs.get("shift")
             if not semester_text or not shift: # semester_text can be any string now
                 messagebox.showerror("Missing Data", "Semester (as text) and Shift are required for class sections.")
                 return None
-            query = "SELECT id FROM class_sections WHERE name = ? AND semester = ? AND shift = ?"
-            params = (name, semester_text, shift)
+            key = (name, semester_text, shift)
         else:
             messagebox.showerror("Error", f"Unknown table: {table}")
             return None
 
-        cur.execute(query, params)
-        result = cur.fetchone()
-
-        if result:
-            return result[0]
+        if key in cache[table]:
+            return cache[table][key]
         else:
             # Insert the record
-            if table == "teachers":
-                cur.execute("INSERT INTO teachers (name) VALUES (?)", (name,))
-            elif table == "courses":
-                cur.execute("INSERT INTO courses (name, teacher_id, code, indicators) VALUES (?, ?, ?, ?)", 
-                            (name, teacher_id, code, indicators))
-            elif table == "rooms":
-                cur.execute("INSERT INTO rooms (name) VALUES (?)", (int(name),))
-            elif table == "class_sections":
-                cur.execute("INSERT INTO class_sections (name, semester, shift) VALUES (?, ?, ?)", 
-                            (name, semester_text, shift)) # Use semester_text
+            with transaction() as cur:
+                if table == "teachers":
+                    cur.execute("INSERT INTO teachers (name) VALUES (?)", (name,))
+                elif table == "courses":
+                    cur.execute("INSERT INTO courses (name, teacher_id, code, indicators) VALUES (?, ?, ?, ?)", 
+                                (name, teacher_id, code, indicators))
+                elif table == "rooms":
+                    cur.execute("INSERT INTO rooms (name) VALUES (?)", (int(name),))
+                elif table == "class_sections":
+                    cur.execute("INSERT INTO class_sections (name, semester, shift) VALUES (?, ?, ?)", 
+                                (name, semester_text, shift)) # Use semester_text
             
-            conn.commit()
+            cache[table][key] = cur.lastrowid
             return cur.lastrowid
 
     except sqlite3.Error as e:
@@ -135,15 +443,99 @@ def fetch_id_from_name(table, name, **kwargs):
         messagebox.showerror("Error", f"An unexpected error occurred in fetch_id_from_name for {table} '{name}': {e}")
         return None
 
-def load_timetable(shift, semester_label=None): # Primary filter is shift, semester_label is optional text filter
+def save_timetable_entries(entries, replace=True):
     """
-    Load timetable entries from the database.
-    Primary filter: shift.
-    Optional secondary filter: semester_label (exact string match).
+    Save timetable entries in one transaction.
+    entries: iterable of dicts with 'shift', 'semester', 'class_section', 'room', 'teacher',
+    'course_code', 'course_name' and 'indicators'.
+    Teachers, courses, rooms and class sections are created with set-based upserts (existing
+    courses get their indicators updated), then all timetable rows are inserted with executemany.
+    With replace=True the existing timetable entries are removed first.
+    Rows with an invalid room, no course code, or no semester/shift are skipped.
+    Each saved entry dict gets the id of its new row as 'entry_id'.
+    Returns (saved, skipped), or None if the save failed and was rolled back.
     """
-    cur = conn.cursor()
-    
-    query = '''
+    rows = []
+    saved_entries = []
+    skipped = 0
+    for e in entries:
+        try:
+            room = int(e['room'])
+        except (TypeError, ValueError):
+            room = 0
+        if room <= 0 or not e['course_code'] or not e['semester'] or not e['shift']:
+            skipped += 1
+            continue
+        rows.append((e['teacher'], e['course_name'], e['course_code'], e.get('indicators', ''),
+                     room, e['class_section'], e['semester'], e['shift']))
+        saved_entries.append(e)
+
+    try:
+        with transaction() as cur:
+            if replace:
+                cur.execute("DELETE FROM timetable")
+
+            cur.executemany(
+                "INSERT INTO teachers (name) VALUES (?) ON CONFLICT(name) DO NOTHING",
+                {(r[0],) for r in rows}
+            )
+            teacher_ids = dict(cur.execute("SELECT name, id FROM teachers").fetchall())
+
+            # The last indicators given for a course win, as with the row-by-row save
+            courses = {(r[1], r[2], teacher_ids[r[0]]): r[3] for r in rows}
+            cur.executemany(
+                """INSERT INTO courses (name, code, teacher_id, indicators) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(name, code, teacher_id) DO UPDATE SET indicators = excluded.indicators""",
+                [(name, code, teacher_id, indicators) for (name, code, teacher_id), indicators in courses.items()]
+            )
+            course_ids = {
+                (name, code, teacher_id): course_id
+                for course_id, name, code, teacher_id in cur.execute("SELECT id, name, code, teacher_id FROM courses")
+            }
+
+            cur.executemany(
+                "INSERT INTO rooms (name) VALUES (?) ON CONFLICT(name) DO NOTHING",
+                {(r[4],) for r in rows}
+            )
+            room_ids = dict(cur.execute("SELECT name, id FROM rooms").fetchall())
+
+            cur.executemany(
+                "INSERT INTO class_sections (name, semester, shift) VALUES (?, ?, ?) ON CONFLICT(name, semester, shift) DO NOTHING",
+                {(r[5], r[6], r[7]) for r in rows}
+            )
+            section_ids = {
+                (name, semester, shift): section_id
+                for section_id, name, semester, shift in cur.execute("SELECT id, name, semester, shift FROM class_sections")
+            }
+
+            # AUTOINCREMENT ids only grow, so the rows inserted below are the ones after last_id, in order
+            last_id = cur.execute("SELECT COALESCE(MAX(id), 0) FROM timetable").fetchone()[0]
+            cur.executemany(
+                "INSERT INTO timetable (teacher_id, course_id, room_id, class_section_id, semester, shift) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        teacher_ids[teacher],
+                        course_ids[(course_name, code, teacher_ids[teacher])],
+                        room_ids[room],
+                        section_ids[(section, semester, shift)],
+                        semester, shift
+                    )
+                    for teacher, course_name, code, _, room, section, semester, shift in rows
+                ]
+            )
+            new_ids = cur.execute("SELECT id FROM timetable WHERE id > ? ORDER BY id", (last_id,)).fetchall()
+        for e, (entry_id,) in zip(saved_entries, new_ids):
+            e['entry_id'] = entry_id
+        # The id maps read back above are complete, so they become the identity cache
+        global _id_cache
+        _id_cache = {"teachers": teacher_ids, "courses": course_ids, "rooms": room_ids, "class_sections": section_ids}
+        return len(rows), skipped
+    except sqlite3.Error as e:
+        invalidate_id_cache()
+        messagebox.showerror("Database Error", f"Failed to save timetable entries: {e}")
+        return None
+
+LOAD_TIMETABLE_QUERY = '''
         SELECT 
             t.id AS entry_id,
             t.teacher_id,
@@ -165,76 +557,562 @@ def load_timetable(shift, semester_label=None): # Primary filter is shift, semes
         JOIN class_sections ON t.class_section_id = class_sections.id
         WHERE t.shift = ? 
     '''
-    params_list = [shift]
-    
-    if semester_label: # If a specific semester label is provided for further filtering
-        query += ' AND t.semester = ?'
-        params_list.append(semester_label)
-    
-    cur.execute(query, tuple(params_list))
-    
-    columns = [
-        'entry_id', 'teacher_id', 'teacher_name', 
-        'course_id', 'course_name', 'course_code', 'course_indicators',
-        'room_id', 'room_name', 
-        'class_section_id', 'class_section_name', 
-        'semester', 'shift'
-    ]
-    
-    return [dict(zip(columns, row)) for row in cur.fetchall()]
 
-def load_timetable_for_ga(shift): # Only takes shift as primary criteria
-    """
-    Load all necessary data for the GA, filtered ONLY by shift.
-    Semester is just a descriptive attribute of the loaded entries.
-    """
-    cur = conn.cursor()
-    query = """
+TIMETABLE_COLUMNS = (
+    'entry_id', 'teacher_id', 'teacher_name',
+    'course_id', 'course_name', 'course_code', 'course_indicators',
+    'room_id', 'room_name',
+    'class_section_id', 'class_section_name',
+    'semester', 'shift'
+)
+TimetableRow = namedtuple('TimetableRow', TIMETABLE_COLUMNS)
+
+LOAD_GA_QUERY = """
         SELECT 
             tt.teacher_id, tt.course_id, tt.room_id, tt.class_section_id, 
             tt.semester, -- Text semester label
             tt.shift,
             c.name as course_name, c.code as course_code, c.indicators as course_indicators,
-            r.name as room_name,
+            r.name as room_name, r.capacity as room_capacity, r.room_type,
             t.name as teacher_name,
-            cs.name as class_section_name
+            cs.name as class_section_name, cs.strength as section_strength
         FROM timetable tt
         JOIN courses c ON tt.course_id = c.id
         JOIN rooms r ON tt.room_id = r.id
         JOIN teachers t ON tt.teacher_id = t.id
         JOIN class_sections cs ON tt.class_section_id = cs.id
-        WHERE tt.shift = ? 
     """
-    # Removed semester from WHERE clause for GA data loading
+
+GA_COLUMNS = (
+    'teacher_id', 'course_id', 'room_id', 'class_section_id',
+    'semester', 'shift',
+    'course_name', 'course_code', 'course_indicators',
+    'room_name', 'room_capacity', 'room_type', 'teacher_name',
+    'class_section_name', 'section_strength'
+)
+GARow = namedtuple('GARow', GA_COLUMNS)
+
+# Rows fetched per round trip by the streaming loaders
+STREAM_BATCH_SIZE = 500
+
+def _row_factory(columns, row_type, row_format):
+    """Cursor row factory for a row_format: 'dict', 'namedtuple' (row_type) or 'tuple'."""
+    if row_format == 'dict':
+        return lambda cursor, row: dict(zip(columns, row))
+    if row_format == 'namedtuple':
+        return lambda cursor, row: row_type._make(row)
+    if row_format == 'tuple':
+        return None
+    raise ValueError(f"Unknown row format: {row_format!r}")
+
+def _stream_rows(query, params, row_factory, batch_size):
+    """Yield the rows of a query, fetched batch_size at a time."""
+    cur = conn.cursor()
+    cur.row_factory = row_factory
+    cur.execute(query, params)
+    while True:
+        batch = cur.fetchmany(batch_size)
+        if not batch:
+            break
+        yield from batch
+
+def stream_timetable(shift, semester_label=None, row_format='dict', batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream the timetable entries of a shift (optionally of one semester label) without
+    loading them all at once. Rows have the TIMETABLE_COLUMNS, as dicts, TimetableRow
+    namedtuples or plain tuples depending on row_format.
+    """
+    query = LOAD_TIMETABLE_QUERY
     params = [shift]
-    
-    cur.execute(query, tuple(params))
-    
-    columns = [
-        'teacher_id', 'course_id', 'room_id', 'class_section_id', 
-        'semester', 'shift', 
-        'course_name', 'course_code', 'course_indicators', 
-        'room_name', 'teacher_name', 'class_section_name'
-    ]
-    results = [dict(zip(columns, row)) for row in cur.fetchall()]
-    print(f"Loaded {len(results)} entries for GA for shift: {shift}")
+    if semester_label: # If a specific semester label is provided for further filtering
+        query += ' AND t.semester = ?'
+        params.append(semester_label)
+    return _stream_rows(query, params, _row_factory(TIMETABLE_COLUMNS, TimetableRow, row_format), batch_size)
+
+def load_timetable(shift, semester_label=None): # Primary filter is shift, semester_label is optional text filter
+    """
+    Load timetable entries from the database as a list of dicts.
+    Primary filter: shift.
+    Optional secondary filter: semester_label (exact string match).
+    """
+    return list(stream_timetable(shift, semester_label))
+
+def _ga_query(shift):
+    """LOAD_GA_QUERY and its parameters for one shift, or for every shift ordered by shift."""
+    if shift is None:
+        return LOAD_GA_QUERY + " ORDER BY tt.shift", []
+    return LOAD_GA_QUERY + " WHERE tt.shift = ?", [shift]
+
+def stream_timetable_for_ga(shift=None, row_format='dict', batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream the GA data of a shift, or of every shift ordered by shift when shift=None.
+    Rows have the GA_COLUMNS, as dicts, GARow namedtuples or plain tuples depending on row_format.
+    """
+    query, params = _ga_query(shift)
+    return _stream_rows(query, params, _row_factory(GA_COLUMNS, GARow, row_format), batch_size)
+
+def load_timetable_for_ga(shift=None): # Only takes shift as primary criteria
+    """
+    Load all necessary data for the GA, filtered ONLY by shift.
+    Semester is just a descriptive attribute of the loaded entries.
+    With shift=None the entries of all shifts are loaded in one query (see load_timetable_for_ga_by_shift).
+    """
+    results = list(stream_timetable_for_ga(shift))
+    print(f"Loaded {len(results)} entries for GA for shift: {shift or 'All'}")
     return results
 
+def load_timetable_for_ga_by_shift(row_format='dict'):
+    """Load the GA data of every shift in one query, grouped as {shift: [rows]} (rows as in stream_timetable_for_ga)."""
+    by_shift = {}
+    for row in stream_timetable_for_ga(row_format=row_format):
+        shift = row['shift'] if row_format == 'dict' else row[GA_COLUMNS.index('shift')]
+        by_shift.setdefault(shift, []).append(row)
+    return by_shift
+
 def delete_timetable_entry_from_db(entry_id):
     """
     Delete a timetable entry from the database by its ID.
     Returns True if successful, False otherwise.
     """
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM timetable WHERE id = ?", (entry_id,))
-        conn.commit()
+        with transaction() as cur:
+            cur.execute("DELETE FROM timetable WHERE id = ?", (entry_id,))
         return cur.rowcount > 0
     except sqlite3.Error as e:
         messagebox.showerror("Database Error", f"Failed to delete entry from database: {e}")
         return False
 
+def delete_timetable_entries(entry_ids):
+    """
+    Delete the timetable entries with the given IDs in one transaction.
+    Returns the number of rows deleted, or None if the delete failed.
+    """
+    try:
+        with transaction() as cur:
+            cur.executemany("DELETE FROM timetable WHERE id = ?", [(entry_id,) for entry_id in entry_ids])
+        return cur.rowcount
+    except sqlite3.Error as e:
+        messagebox.showerror("Database Error", f"Failed to delete from database: {e}")
+        return None
+
+def save_accepted_timetable(shift, lectures):
+    """
+    Replace the accepted timetable for a shift.
+    lectures: iterable of GA lecture dicts (course_name, course_code, time_slot, room, teacher, semester, class_section).
+    Returns True if successful, False otherwise.
+    """
+    from datetime import datetime
+    accepted_at = datetime.now().isoformat(timespec="seconds")
+    rows = [
+        (
+            shift, d['semester'], d['class_section'], d['course_name'], d['course_code'],
+            d.get('course_indicators', ''), d['teacher'], str(d['room']), d['time_slot'], accepted_at
+        )
+        for d in lectures
+    ]
+    try:
+        with transaction() as cur:
+            cur.execute("DELETE FROM accepted_timetable WHERE shift = ?", (shift,))
+            cur.executemany(
+                """INSERT INTO accepted_timetable
+                   (shift, semester, class_section, course_name, course_code, course_indicators,
+                    teacher, room, time_slot, accepted_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+        return True
+    except sqlite3.Error as e:
+        messagebox.showerror("Database Error", f"Failed to save accepted timetable: {e}")
+        return False
+
+def load_accepted_timetable(shift):
+    """
+    Load the accepted timetable for a shift in the GA timetable format:
+    {(semester, course_name, class_section, idx, course_code): lecture details}.
+    Returns an empty dict if nothing has been accepted for the shift yet.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT semester, class_section, course_name, course_code, course_indicators,
+               teacher, room, time_slot
+        FROM accepted_timetable
+        WHERE shift = ?
+        ORDER BY semester, class_section, course_code, time_slot
+    """, (shift,))
+    return _to_ga_timetable(cur.fetchall())
+
+def _to_ga_timetable(rows):
+    """
+    Build the GA timetable format from (semester, class_section, course_name, course_code,
+    course_indicators, teacher, room, time_slot) rows sorted by section, course and slot.
+    """
+    timetable = {}
+    lecture_counts = {}
+    for semester, section, course, code, indicators, teacher, room, time_slot in rows:
+        block = (semester, course, section, code)
+        idx = lecture_counts.get(block, 0)
+        lecture_counts[block] = idx + 1
+        timetable[(semester, course, section, idx, code)] = {
+            'course_name': course,
+            'course_code': code,
+            'course_indicators': indicators or '',
+            'time_slot': time_slot,
+            'room': room,
+            'teacher': teacher,
+            'semester': semester,
+            'class_section': section
+        }
+    return timetable
+
+def save_pinned_lectures(shift, lectures):
+    """
+    Replace the pinned lectures for a shift.
+    lectures: iterable of GA lecture dicts (semester, class_section, course_name, course_code, time_slot, room).
+    Returns True if successful, False otherwise.
+    """
+    rows = [
+        (shift, d['semester'], d['class_section'], d['course_name'], d['course_code'], d['time_slot'], str(d['room']))
+        for d in lectures
+    ]
+    try:
+        with transaction() as cur:
+            cur.execute("DELETE FROM pinned_lectures WHERE shift = ?", (shift,))
+            cur.executemany(
+                """INSERT OR IGNORE INTO pinned_lectures
+                   (shift, semester, class_section, course_name, course_code, time_slot, room)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+        return True
+    except sqlite3.Error as e:
+        messagebox.showerror("Database Error", f"Failed to save pinned lectures: {e}")
+        return False
+
+def load_pinned_lectures(shift):
+    """
+    Load the pinned lectures for a shift as a list of dicts
+    (semester, class_section, course_name, course_code, time_slot, room); room is None for
+    pins saved before rooms were recorded.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT semester, class_section, course_name, course_code, time_slot, room
+        FROM pinned_lectures
+        WHERE shift = ?
+    """, (shift,))
+    columns = ['semester', 'class_section', 'course_name', 'course_code', 'time_slot', 'room']
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+# Columns stored for each kind of schedule; the first IDENTITY_COLUMNS of each identify what
+# is being scheduled (a lecture or exam), the rest are where and when it was placed
+SCHEDULE_COLUMNS = {
+    "timetable": ['semester', 'class_section', 'course_code', 'course_name', 'course_indicators',
+                  'teacher', 'room', 'time_slot'],
+    "datesheet": ['semester', 'class_section', 'course_code', 'subject', 'shift',
+                  'teacher', 'room', 'invigilator', 'date', 'time', 'end_time'],
+}
+IDENTITY_COLUMNS = {"timetable": 4, "datesheet": 3}
+
+def _encode_assignments(assignments, columns):
+    """
+    Encode assignment dicts compactly: each distinct value is stored once in a string table
+    and rows become unsigned 32-bit indices into it, the whole zlib-compressed.
+    """
+    strings = []
+    index = {}
+    codes = array('I')
+    for assignment in assignments:
+        for column in columns:
+            value = assignment.get(column)
+            value = "" if value is None else str(value)
+            if value not in index:
+                index[value] = len(strings)
+                strings.append(value)
+            codes.append(index[value])
+    if sys.byteorder == "big":
+        codes.byteswap()  # Stored little-endian
+    header = json.dumps({"columns": columns, "strings": strings}, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(header + b"\n" + codes.tobytes())
+
+def _decode_assignments(blob):
+    """Decode _encode_assignments output back into a list of dicts of strings."""
+    header, _, body = zlib.decompress(blob).partition(b"\n")
+    header = json.loads(header)
+    columns, strings = header["columns"], header["strings"]
+    codes = array('I')
+    codes.frombytes(body)
+    if sys.byteorder == "big":
+        codes.byteswap()
+    width = len(columns)
+    return [
+        dict(zip(columns, (strings[code] for code in codes[i:i + width])))
+        for i in range(0, len(codes), width)
+    ]
+
+def save_schedule_version(kind, assignments, params, random_seed=None, fitness=None, shift=None, label=None):
+    """
+    Store a generated schedule as a new version.
+    kind: 'timetable' (assignments are GA lecture dicts) or 'datesheet' (exam dicts from
+    DatesheetGeneticAlgorithm.run). params: JSON-serialisable generation parameters, enough
+    to reopen the schedule (e.g. days and slot times). Returns the version id, or None on failure.
+    """
+    from datetime import datetime
+    assignments = list(assignments)
+    try:
+        with transaction() as cur:
+            cur.execute(
+                """INSERT INTO schedule_versions
+                   (kind, shift, label, params, random_seed, fitness, n_assignments, created_at, assignments)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    kind, shift, label, json.dumps(params), random_seed,
+                    None if fitness is None else float(fitness), len(assignments),
+                    datetime.now().isoformat(timespec="seconds"),
+                    _encode_assignments(assignments, SCHEDULE_COLUMNS[kind])
+                )
+            )
+        return cur.lastrowid
+    except sqlite3.Error as e:
+        messagebox.showerror("Database Error", f"Failed to save the generated {kind}: {e}")
+        return None
+
+def list_schedule_versions(kind, shift=None, limit=100):
+    """
+    List saved versions of a kind, newest first, without their assignments:
+    dicts with 'id', 'shift', 'label', 'params', 'random_seed', 'fitness', 'n_assignments', 'created_at'.
+    shift=None lists the versions of every shift.
+    """
+    query = """
+        SELECT id, shift, label, params, random_seed, fitness, n_assignments, created_at
+        FROM schedule_versions WHERE kind = ?
+    """
+    params = [kind]
+    if shift is not None:
+        query += " AND shift = ?"
+        params.append(shift)
+    query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    params.append(limit)
+    cur = conn.cursor()
+    cur.execute(query, params)
+    columns = ['id', 'shift', 'label', 'params', 'random_seed', 'fitness', 'n_assignments', 'created_at']
+    versions = [dict(zip(columns, row)) for row in cur.fetchall()]
+    for version in versions:
+        version['params'] = json.loads(version['params'])
+    return versions
+
+def load_schedule_version(version_id):
+    """Load a saved version with its metadata (see list_schedule_versions), 'kind' and 'assignments'; None if missing."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT id, kind, shift, label, params, random_seed, fitness, n_assignments, created_at, assignments
+        FROM schedule_versions WHERE id = ?
+    """, (version_id,))
+    row = cur.fetchone()
+    if row is None:
+        return None
+    columns = ['id', 'kind', 'shift', 'label', 'params', 'random_seed', 'fitness', 'n_assignments', 'created_at', 'assignments']
+    version = dict(zip(columns, row))
+    version['params'] = json.loads(version['params'])
+    version['assignments'] = _decode_assignments(version['assignments'])
+    return version
+
+def load_timetable_version(version_id):
+    """
+    Load a saved timetable version in the GA timetable format (like load_accepted_timetable),
+    e.g. to display it again or as the seed_timetable of a warm start. Empty dict if missing.
+    """
+    version = load_schedule_version(version_id)
+    if version is None or version['kind'] != "timetable":
+        return {}
+    columns = ['semester', 'class_section', 'course_name', 'course_code', 'course_indicators', 'teacher', 'room', 'time_slot']
+    # Same order as load_accepted_timetable: section, course code, time slot
+    rows = sorted((tuple(a[c] for c in columns) for a in version['assignments']), key=lambda r: (r[0], r[1], r[3], r[7]))
+    return _to_ga_timetable(rows)
+
+def diff_schedule_versions(old_id, new_id):
+    """
+    Compare two saved versions of the same kind. Lectures/exams are matched by their identity
+    columns (section and course), so repeated lectures of a course count as interchangeable.
+    Returns {'changed': [(old, new)], 'added': [new], 'removed': [old], 'unchanged': count},
+    where changed pairs are the same lecture/exam placed differently.
+    """
+    old, new = load_schedule_version(old_id), load_schedule_version(new_id)
+    if old is None or new is None:
+        raise ValueError("Unknown schedule version")
+    if old['kind'] != new['kind']:
+        raise ValueError("Cannot compare a timetable with a datesheet")
+    columns = SCHEDULE_COLUMNS[old['kind']]
+    n_identity = IDENTITY_COLUMNS[old['kind']]
+
+    def as_counter(assignments):
+        return Counter(tuple(a[c] for c in columns) for a in assignments)
+
+    old_rows, new_rows = as_counter(old['assignments']), as_counter(new['assignments'])
+    removed = sorted((old_rows - new_rows).elements())
+    added = sorted((new_rows - old_rows).elements())
+    unchanged = sum((old_rows & new_rows).values())
+
+    # Pair removed and added rows of the same lecture/exam as changes
+    added_by_identity = {}
+    for row in added:
+        added_by_identity.setdefault(row[:n_identity], []).append(row)
+    changed = []
+    only_removed = []
+    for row in removed:
+        candidates = added_by_identity.get(row[:n_identity])
+        if candidates:
+            changed.append((dict(zip(columns, row)), dict(zip(columns, candidates.pop(0)))))
+        else:
+            only_removed.append(dict(zip(columns, row)))
+    only_added = [dict(zip(columns, row)) for rows in added_by_identity.values() for row in rows]
+    return {'changed': changed, 'added': only_added, 'removed': only_removed, 'unchanged': unchanged}
+
+def load_teacher_availability():
+    """
+    Load availability windows for all teachers:
+    {teacher_name: [{'day', 'start', 'end', 'status'}, ...]}.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT t.name, a.day, a.start_time, a.end_time, a.status
+        FROM teacher_availability a
+        JOIN teachers t ON a.teacher_id = t.id
+        ORDER BY t.name, a.id
+    """)
+    availability = {}
+    for name, day, start, end, status in cur.fetchall():
+        availability.setdefault(name, []).append({'day': day, 'start': start, 'end': end, 'status': status})
+    return availability
+
+def load_teacher_max_daily_load():
+    """Load per-teacher daily lecture limits: {teacher_name: max_daily_lectures}."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT t.name, p.max_daily_lectures
+        FROM teacher_preferences p
+        JOIN teachers t ON p.teacher_id = t.id
+        WHERE p.max_daily_lectures IS NOT NULL
+    """)
+    return dict(cur.fetchall())
+
+def save_teacher_availability(teacher_name, windows, max_daily_lectures=None):
+    """
+    Replace a teacher's availability windows and daily lecture limit.
+    windows: list of dicts with 'day', 'start', 'end' and 'status'.
+    Returns True if successful, False otherwise.
+    """
+    teacher_id = fetch_id_from_name("teachers", teacher_name)
+    if not teacher_id:
+        return False
+    try:
+        with transaction() as cur:
+            cur.execute("DELETE FROM teacher_availability WHERE teacher_id = ?", (teacher_id,))
+            cur.executemany(
+                "INSERT INTO teacher_availability (teacher_id, day, start_time, end_time, status) VALUES (?, ?, ?, ?, ?)",
+                [(teacher_id, w['day'], w['start'], w['end'], w['status']) for w in windows]
+            )
+            cur.execute(
+                "INSERT OR REPLACE INTO teacher_preferences (teacher_id, max_daily_lectures) VALUES (?, ?)",
+                (teacher_id, max_daily_lectures)
+            )
+        return True
+    except sqlite3.Error as e:
+        messagebox.showerror("Database Error", f"Failed to save availability for '{teacher_name}': {e}")
+        return False
+
+def load_timetable_for_datesheet(shift=None, include_labs=True):
+    """
+    Load timetable entries for the datesheet as (shift, semester, class_section, room,
+    teacher_name, course_code, course_name, indicators) tuples, ordered by shift, semester
+    and section. shift=None loads every shift; include_labs=False leaves out lab courses.
+    """
+    query = """
+        SELECT 
+            t.shift, t.semester, cs.name as class_section, r.name as room,
+            te.name as teacher_name, c.code as course_code, c.name as course_name, c.indicators
+        FROM timetable t
+        JOIN teachers te ON t.teacher_id = te.id
+        JOIN courses c ON t.course_id = c.id
+        JOIN rooms r ON t.room_id = r.id
+        JOIN class_sections cs ON t.class_section_id = cs.id
+    """
+    where = []
+    params = []
+    if shift is not None:
+        where.append("t.shift = ?")
+        params.append(shift)
+    if not include_labs:
+        # The word "lab" among the indicators, as in timetable_ga.is_lab_course (LIKE ignores case)
+        where.append(
+            "NOT (' ' || REPLACE(REPLACE(REPLACE(COALESCE(c.indicators, ''), ',', ' '), '(', ' '), ')', ' ') || ' '"
+            " LIKE '% lab %')"
+        )
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY t.shift, t.semester, cs.name"
+    cur = conn.cursor()
+    cur.execute(query, params)
+    return cur.fetchall()
+
+def load_section_strengths():
+    """Load the known class section strengths: {(semester, section_name): strength}."""
+    cur = conn.cursor()
+    cur.execute("SELECT semester, name, strength FROM class_sections WHERE strength IS NOT NULL")
+    return {(semester, name): strength for semester, name, strength in cur.fetchall()}
+
+def load_room_info():
+    """Load room attributes for all rooms: {room_name (str): {'capacity', 'room_type'}}."""
+    cur = conn.cursor()
+    cur.execute("SELECT name, capacity, room_type FROM rooms")
+    return {
+        str(name): {'capacity': capacity, 'room_type': room_type or 'lecture'}
+        for name, capacity, room_type in cur.fetchall()
+    }
+
+def save_room_info(room_name, capacity, room_type):
+    """Update a room's capacity (None if unknown) and type ('lecture' or 'lab')."""
+    try:
+        with transaction() as cur:
+            cur.execute(
+                "UPDATE rooms SET capacity = ?, room_type = ? WHERE name = ?",
+                (capacity, room_type, int(room_name))
+            )
+        return cur.rowcount > 0
+    except (sqlite3.Error, ValueError) as e:
+        messagebox.showerror("Database Error", f"Failed to update room '{room_name}': {e}")
+        return False
+
+def save_section_strength(class_section_id, strength):
+    """Update the number of students in a class section (None if unknown)."""
+    try:
+        with transaction() as cur:
+            cur.execute("UPDATE class_sections SET strength = ? WHERE id = ?", (strength, class_section_id))
+        return cur.rowcount > 0
+    except sqlite3.Error as e:
+        messagebox.showerror("Database Error", f"Failed to update class section strength: {e}")
+        return False
+
+def erase_all_database_data():
+    """
+    Delete all timetable entries, courses, teachers, rooms and class sections
+    (accepted timetables and pinned lectures are kept). Returns True if successful.
+    """
+    try:
+        with transaction() as cur:
+            # Order matters due to foreign keys
+            cur.execute("DELETE FROM timetable")
+            cur.execute("DELETE FROM courses")
+            cur.execute("DELETE FROM teachers")
+            cur.execute("DELETE FROM rooms")
+            cur.execute("DELETE FROM class_sections")
+        return True
+    except sqlite3.Error as e:
+        messagebox.showerror("Database Error", f"Failed to erase database data: {e}")
+        return False
+    finally:
+        invalidate_id_cache()
+
 def close_db():
-    conn.close()
+    conn.close_all()
     
     
\ No newline at end of file
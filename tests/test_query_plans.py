@@ -0,0 +1,61 @@
+"""
+Query plan checks for db/timetable_db.py: the load and delete paths must use their indexes,
+so a schema or query change that drops back to full table scans fails here.
+Each test builds and migrates a fresh database in a temporary directory.
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import timetable_db  # noqa: E402
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "timetable.db")
+    monkeypatch.setattr(timetable_db, "db_path", path)
+    monkeypatch.setattr(timetable_db, "conn", timetable_db._ThreadConnections())
+    timetable_db.invalidate_id_cache()
+    assert timetable_db.migrate_timetable_db() == timetable_db.MIGRATIONS[-1][0]
+    yield path
+    timetable_db.close_db()
+    timetable_db.invalidate_id_cache()
+
+def explain_query_plan(path, query, params=()):
+    """The detail lines of SQLite's EXPLAIN QUERY PLAN for a query"""
+    # No statement cache: cached EXPLAIN statements are not re-planned after schema changes
+    plan_conn = sqlite3.connect(path, cached_statements=0)
+    try:
+        return [row[3] for row in plan_conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+    finally:
+        plan_conn.close()
+
+def test_load_timetable_uses_covering_shift_index(db_file):
+    plan = explain_query_plan(db_file, timetable_db.LOAD_TIMETABLE_QUERY + " AND t.semester = ?", ("Morning", ""))
+    assert any(line.startswith("SEARCH t USING COVERING INDEX idx_timetable_shift ") for line in plan), plan
+
+def test_load_timetable_for_ga_uses_covering_shift_index(db_file):
+    plan = explain_query_plan(db_file, timetable_db.LOAD_GA_QUERY + " WHERE tt.shift = ?", ("Morning",))
+    assert any(line.startswith("SEARCH tt USING COVERING INDEX idx_timetable_shift ") for line in plan), plan
+
+@pytest.mark.parametrize("column, index", [
+    ("teacher_id", "idx_timetable_teacher"),
+    ("course_id", "idx_timetable_course"),
+    ("room_id", "idx_timetable_room"),
+])
+def test_parent_deletes_search_timetable_by_index(db_file, column, index):
+    plan = explain_query_plan(db_file, f"DELETE FROM timetable WHERE {column} = ?", (0,))
+    assert any(line.startswith("SEARCH timetable USING ") and f"INDEX {index} " in line for line in plan), plan
+
+def test_timetable_has_only_the_load_and_foreign_key_indexes(db_file):
+    plan_conn = sqlite3.connect(db_file)
+    try:
+        indexes = {row[0] for row in plan_conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'timetable' AND sql IS NOT NULL"
+        )}
+    finally:
+        plan_conn.close()
+    assert indexes == {"idx_timetable_shift", "idx_timetable_teacher", "idx_timetable_course", "idx_timetable_room"}
@@ -1,14 +1,17 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTabWidget, QInputDialog,
     QTableWidget, QTableWidgetItem, QComboBox, QCheckBox, QHeaderView, QDialog, QLineEdit,
-    QDateEdit, QTimeEdit, QScrollArea
+    QDateEdit, QTimeEdit, QScrollArea, QSpinBox, QFileDialog
 )
 from PyQt6.QtCore import Qt, QDate, QTime
 from PyQt6.QtGui import QFont
-import os
 import sqlite3
 from PyQt6.QtWidgets import QInputDialog, QMessageBox
 from algorithms.datesheet_ga import DatesheetGeneticAlgorithm
+from algorithms.exam_calendar import load_holidays
+from algorithms.timetable_ga import is_lab_course
+from db import timetable_db
+from ui.timetable_ui import describe_schedule_diff
 
 class DatesheetWindow(QWidget):
     def __init__(self, back_callback=None):
@@ -254,6 +257,7 @@ class DatesheetWindow(QWidget):
         load_db_btn = QPushButton("Load from DB")
         load_db_btn.setStyleSheet(self.get_button_style("#007bff", min_width="150px"))
         generate_btn = QPushButton("Generate Datesheet")
+        versions_btn = QPushButton("Saved Datesheets")
         generate_btn.setStyleSheet(self.get_button_style("#17a2b8", min_width="180px"))
         generate_btn.setFont(QFont("Arial", 12, QFont.Weight.Bold))
         buttons_layout.addWidget(delete_btn)
@@ -262,11 +266,13 @@ class DatesheetWindow(QWidget):
         buttons_layout.addWidget(load_db_btn)
         buttons_layout.addStretch()
         buttons_layout.addWidget(generate_btn)
+        buttons_layout.addWidget(versions_btn)
         # Connect your button slots here
         delete_btn.clicked.connect(self.delete_selected_entries)
         clear_btn.clicked.connect(self.clear_all_entries)
         load_db_btn.clicked.connect(self.load_from_db)
         generate_btn.clicked.connect(self.generate_datesheet_dialog)  # Implement as needed
+        versions_btn.clicked.connect(self.show_datesheet_versions_dialog)
         return buttons_frame
 
     def delete_selected_entries(self):
@@ -311,45 +317,13 @@ class DatesheetWindow(QWidget):
         include_labs = lab_reply == QMessageBox.StandardButton.Yes
 
         # 3. Load data from db
-        import sqlite3
-        import os
-
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db", "timetable.db")
-        if not os.path.exists(db_path):
-            QMessageBox.warning(self, "Database Not Found", f"Could not find {db_path}")
-            return
-
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        query = """
-            SELECT 
-                t.shift, t.semester, cs.name as class_section, r.name as room,
-                te.name as teacher_name, c.code as course_code, c.name as course_name, c.indicators
-            FROM timetable t
-            JOIN teachers te ON t.teacher_id = te.id
-            JOIN courses c ON t.course_id = c.id
-            JOIN rooms r ON t.room_id = r.id
-            JOIN class_sections cs ON t.class_section_id = cs.id
-        """
-        where = []
-        params = []
-        if shift != "All":
-            where.append("t.shift = ?")
-            params.append(shift)
-        if not include_labs:
-            where.append("(c.indicators IS NULL OR c.indicators = '')")
-        if where:
-            query += " WHERE " + " AND ".join(where)
-        query += " ORDER BY t.shift, t.semester, cs.name"
-
         try:
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-        except Exception as e:
+            rows = timetable_db.load_timetable_for_datesheet(
+                shift=None if shift == "All" else shift, include_labs=include_labs
+            )
+        except sqlite3.Error as e:
             QMessageBox.critical(self, "DB Error", str(e))
-            conn.close()
             return
-        conn.close()
 
         # 4. Organize by (shift, semester, class_section)
         tabs_data = {}  # key: (shift, semester, class_section), value: list of rows
@@ -366,7 +340,7 @@ class DatesheetWindow(QWidget):
                 "teacher_name": teacher_name,
                 "course_code": course_code,
                 "course_name": course_name,
-                "is_lab": bool(indicators and indicators.strip())
+                "is_lab": is_lab_course(indicators)
             })
 
         # 5. Clear all tabs
@@ -471,6 +445,54 @@ class DatesheetWindow(QWidget):
         layout.addWidget(QLabel("Exam End Time:"))
         layout.addWidget(exam_end_time_edit)
 
+        # Optional deadline: warn when the exams cannot finish by this date
+        finish_by_check = QCheckBox("Finish Exams By:")
+        finish_by_edit = QDateEdit()
+        finish_by_edit.setCalendarPopup(True)
+        finish_by_edit.setDate(QDate.currentDate().addMonths(1))
+        finish_by_edit.setEnabled(False)
+        finish_by_check.toggled.connect(finish_by_edit.setEnabled)
+        layout.addWidget(finish_by_check)
+        layout.addWidget(finish_by_edit)
+
+        # Sessions per day: the exam window is split into equal sessions (e.g. morning/afternoon)
+        sessions_spin = QSpinBox()
+        sessions_spin.setRange(1, 4)
+        sessions_spin.setValue(1)
+        layout.addWidget(QLabel("Exam Sessions per Day:"))
+        layout.addWidget(sessions_spin)
+
+        max_duties_spin = QSpinBox()
+        max_duties_spin.setRange(1, 4)
+        max_duties_spin.setValue(2)
+        layout.addWidget(QLabel("Max Invigilation Duties per Teacher per Day:"))
+        layout.addWidget(max_duties_spin)
+
+        # Slack days on top of the shortest season; the GA adds more itself if conflicts remain
+        extra_days_spin = QSpinBox()
+        extra_days_spin.setRange(0, 30)
+        extra_days_spin.setValue(0)
+        layout.addWidget(QLabel("Extra Exam Days:"))
+        layout.addWidget(extra_days_spin)
+
+        # Days the GA may add on its own, one at a time, while conflicts remain (never past Finish Exams By)
+        max_added_days_spin = QSpinBox()
+        max_added_days_spin.setRange(0, 14)
+        max_added_days_spin.setValue(0)
+        layout.addWidget(QLabel("Max Days Added If Conflicts Remain:"))
+        layout.addWidget(max_added_days_spin)
+
+        # Room packing: share large halls between sections using room capacities and section strengths
+        pack_rooms_check = QCheckBox("Pack sections into rooms by capacity (set in Timetable > Rooms && Sections)")
+        layout.addWidget(pack_rooms_check)
+
+        def load_room_packing_data():
+            room_capacities = {
+                name: info["capacity"] for name, info in timetable_db.load_room_info().items()
+                if info["capacity"] is not None
+            }
+            return room_capacities, timetable_db.load_section_strengths()
+
         # Days of the week
         layout.addWidget(QLabel("Exam Days:"))
         days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
@@ -488,6 +510,48 @@ class DatesheetWindow(QWidget):
         excluded_dates_edit = QLineEdit()
         layout.addWidget(excluded_dates_edit)
 
+        # Holiday calendar file: every date in it is excluded
+        layout.addWidget(QLabel("Holiday Calendar (optional, .ics or .csv):"))
+        holidays_layout = QHBoxLayout()
+        holidays_path_edit = QLineEdit()
+        holidays_browse_btn = QPushButton("Browse")
+        holidays_layout.addWidget(holidays_path_edit)
+        holidays_layout.addWidget(holidays_browse_btn)
+        layout.addLayout(holidays_layout)
+
+        def browse_holidays():
+            path, _ = QFileDialog.getOpenFileName(dialog, "Select Holiday Calendar", "", "Calendars (*.ics *.csv)")
+            if path:
+                holidays_path_edit.setText(path)
+        holidays_browse_btn.clicked.connect(browse_holidays)
+
+        # Enrolment overlaps: CSV rows "course_code_a,course_code_b" for courses sharing students
+        layout.addWidget(QLabel("Enrolment Overlaps CSV (optional, rows: course code, course code):"))
+        overlaps_layout = QHBoxLayout()
+        overlaps_path_edit = QLineEdit()
+        overlaps_browse_btn = QPushButton("Browse")
+        overlaps_layout.addWidget(overlaps_path_edit)
+        overlaps_layout.addWidget(overlaps_browse_btn)
+        layout.addLayout(overlaps_layout)
+
+        def browse_overlaps():
+            path, _ = QFileDialog.getOpenFileName(dialog, "Select Enrolment Overlaps", "", "CSV Files (*.csv)")
+            if path:
+                overlaps_path_edit.setText(path)
+        overlaps_browse_btn.clicked.connect(browse_overlaps)
+
+        def load_overlaps():
+            import csv
+            path = overlaps_path_edit.text().strip()
+            if not path:
+                return []
+            with open(path, newline="", encoding="utf-8") as f:
+                return [
+                    (row[0].strip(), row[1].strip())
+                    for row in csv.reader(f)
+                    if len(row) >= 2 and row[0].strip() and row[1].strip()
+                ]
+
         # --- Dialog Buttons ---
         btn_layout = QHBoxLayout()
         cancel_btn = QPushButton("Cancel")
@@ -532,70 +596,6 @@ class DatesheetWindow(QWidget):
                             })
             return entries
 
-        def show_preview(metadata, schedule, exam_start_time, exam_end_time):
-            preview_dialog = QDialog(self)
-            preview_dialog.setWindowTitle("Optimized Datesheet Preview")
-            preview_dialog.resize(900, 600)
-            vbox = QVBoxLayout(preview_dialog)
-
-            # Metadata
-            vbox.addWidget(QLabel(f"<b>{metadata['college_name']}</b>"))
-            vbox.addWidget(QLabel(metadata['datesheet_title']))
-            vbox.addWidget(QLabel(f"Effective Date: {metadata['effective_date']}"))
-            vbox.addWidget(QLabel(f"Department: {metadata['department_name']}"))
-
-            # Tabbed preview by date
-            tab_widget = QTabWidget()
-            from collections import defaultdict
-            import datetime
-            grouped = defaultdict(list)
-            for exam in schedule:
-                grouped[exam.get("date", "N/A")].append(exam)
-            sorted_dates = sorted(grouped.keys(), key=lambda d: d if d == "N/A" else datetime.datetime.strptime(d, "%Y-%m-%d"))
-            for date_str in sorted_dates:
-                exams = grouped[date_str]
-                tab = QWidget()
-                tab_layout = QVBoxLayout(tab)
-                table = QTableWidget()
-                table.setColumnCount(10)
-                table.setHorizontalHeaderLabels([
-                    "Semester", "Subject", "Course Code", "Class Section", "Day", "Date", "Time", "Room", "Shift", "Teacher (Invigilator)"
-                ])
-                table.setRowCount(len(exams))
-                for row, e in enumerate(exams):
-                    # Day name
-                    try:
-                        day_name = datetime.datetime.strptime(date_str, "%Y-%m-%d").strftime("%A")
-                    except Exception:
-                        day_name = "N/A"
-                    # Time range
-                    start_ampm = QTime.fromString(e.get("time", exam_start_time), "HH:mm").toString("hh:mm AP")
-                    end_ampm = QTime.fromString(exam_end_time, "HH:mm").toString("hh:mm AP")
-                    time_range = f"{start_ampm} - {end_ampm}"
-                    values = [
-                        e.get("semester", ""),
-                        e.get("subject", ""),
-                        e.get("course_code", ""),
-                        e.get("class_section", ""),
-                        day_name,
-                        date_str,
-                        time_range,
-                        e.get("room", ""),
-                        e.get("shift", ""),
-                        e.get("teacher", "")
-                    ]
-                    for col, val in enumerate(values):
-                        table.setItem(row, col, QTableWidgetItem(str(val)))
-                table.resizeColumnsToContents()
-                tab_layout.addWidget(table)
-                tab_widget.addTab(tab, f"{date_str} ({day_name})")
-            vbox.addWidget(tab_widget)
-
-            close_btn = QPushButton("Close")
-            close_btn.clicked.connect(preview_dialog.accept)
-            vbox.addWidget(close_btn)
-            preview_dialog.exec()
-
         def on_generate():
             metadata = {
                 "college_name": college_name_edit.text(),
@@ -608,6 +608,7 @@ class DatesheetWindow(QWidget):
             exam_end_time = to_24h(exam_end_time_edit)
             selected_days = [cb.text() for cb in day_checks if cb.isChecked()]
             excluded_dates = [d.strip() for d in excluded_dates_edit.text().split(",") if d.strip()]
+            deadline = finish_by_edit.date().toString("yyyy-MM-dd") if finish_by_check.isChecked() else None
 
             if not start_date:
                 QMessageBox.warning(dialog, "Missing Data", "Please enter the exam start date.")
@@ -624,6 +625,31 @@ class DatesheetWindow(QWidget):
                 QMessageBox.information(dialog, "Info", "Add entries first. These entries will be considered for scheduling.")
                 return
 
+            try:
+                enrolment_overlaps = load_overlaps()
+            except OSError as ex:
+                QMessageBox.warning(dialog, "Enrolment Overlaps", f"Could not read the overlaps file: {ex}")
+                return
+
+            holidays = None
+            if holidays_path_edit.text().strip():
+                try:
+                    holidays = load_holidays(holidays_path_edit.text().strip())
+                except (OSError, ValueError) as ex:
+                    QMessageBox.warning(dialog, "Holiday Calendar", f"Could not read the holiday calendar: {ex}")
+                    return
+
+            room_capacities, section_sizes = None, None
+            if pack_rooms_check.isChecked():
+                try:
+                    room_capacities, section_sizes = load_room_packing_data()
+                except sqlite3.Error as ex:
+                    QMessageBox.warning(dialog, "Room Packing", f"Could not load room capacities: {ex}")
+                    return
+                if not room_capacities:
+                    QMessageBox.warning(dialog, "Room Packing", "No room capacities are set. Set them in the Timetable's Rooms & Sections dialog.")
+                    return
+
             try:
                 ga = DatesheetGeneticAlgorithm(
                     entries=entries,
@@ -633,7 +659,16 @@ class DatesheetWindow(QWidget):
                     exam_start_time=exam_start_time,
                     exam_end_time=exam_end_time,
                     exam_days=selected_days,
-                    excluded_dates=excluded_dates
+                    excluded_dates=excluded_dates,
+                    sessions_per_day=sessions_spin.value(),
+                    max_invigilations_per_day=max_duties_spin.value(),
+                    enrolment_overlaps=enrolment_overlaps,
+                    room_capacities=room_capacities,
+                    section_sizes=section_sizes,
+                    holidays=holidays,
+                    extra_days=extra_days_spin.value(),
+                    max_extra_days=max_added_days_spin.value(),
+                    deadline=deadline
                 )
                 sched = ga.run()
                 if not sched:
@@ -647,7 +682,51 @@ class DatesheetWindow(QWidget):
                         "Try adjusting your parameters and try again."
                     )
                     return
-                show_preview(metadata, sched, exam_start_time, exam_end_time)
+                if ga.unpacked_exams:
+                    QMessageBox.warning(
+                        dialog, "Room Packing",
+                        f"{len(ga.unpacked_exams)} exams could not be given a room. "
+                        "Add rooms or raise Extra Exam Days or Max Days Added."
+                    )
+                if not ga.meets_deadline:
+                    QMessageBox.warning(
+                        dialog, "Exam Season",
+                        f"The exams run until {ga.last_exam_date}, after {deadline}. "
+                        "Start earlier, add exam days of the week or remove excluded dates."
+                    )
+                if ga.unstaffed_sessions:
+                    QMessageBox.warning(
+                        dialog, "Invigilation",
+                        f"{len(ga.unstaffed_sessions)} exam sessions have no invigilator. "
+                        "Add more staff or raise the daily invigilation limit."
+                    )
+                timetable_db.save_schedule_version(
+                    "datesheet", sched,
+                    {
+                        "metadata": metadata,
+                        "start_date": start_date,
+                        "exam_start_time": exam_start_time,
+                        "exam_end_time": exam_end_time,
+                        "exam_days": selected_days,
+                        "excluded_dates": excluded_dates,
+                        "sessions_per_day": sessions_spin.value(),
+                        "max_invigilations_per_day": max_duties_spin.value(),
+                        "extra_days": extra_days_spin.value(),
+                        "max_extra_days": max_added_days_spin.value(),
+                        "deadline": deadline,
+                        # The loaded files' contents, so the version can be regenerated as it was
+                        "holidays_file": holidays_path_edit.text().strip() or None,
+                        "holidays": [str(d) for d in holidays] if holidays is not None else [],
+                        "enrolment_overlaps_file": overlaps_path_edit.text().strip() or None,
+                        "enrolment_overlaps": [list(pair) for pair in enrolment_overlaps],
+                        "pack_rooms": pack_rooms_check.isChecked(),
+                        "room_capacities": {str(room): seats for room, seats in (room_capacities or {}).items()},
+                        "section_sizes": [[semester, section, size] for (semester, section), size in (section_sizes or {}).items()]
+                    },
+                    random_seed=ga.random_seed, fitness=ga.best_fitness,
+                    label=metadata["datesheet_title"]
+                )
+                self.show_datesheet_preview(metadata, sched, exam_start_time, exam_end_time)
                 dialog.accept()
             except Exception as ex:
                 QMessageBox.critical(dialog, "GA Execution Error", f"Failed to generate datesheet: {ex}")
@@ -655,4 +734,139 @@ class DatesheetWindow(QWidget):
         generate_btn.clicked.connect(on_generate)
         dialog.exec()
         
-        
\ No newline at end of file
+        
+
+    def show_datesheet_preview(self, metadata, schedule, exam_start_time, exam_end_time):
+        preview_dialog = QDialog(self)
+        preview_dialog.setWindowTitle("Optimized Datesheet Preview")
+        preview_dialog.resize(900, 600)
+        vbox = QVBoxLayout(preview_dialog)
+
+        # Metadata
+        vbox.addWidget(QLabel(f"<b>{metadata['college_name']}</b>"))
+        vbox.addWidget(QLabel(metadata['datesheet_title']))
+        vbox.addWidget(QLabel(f"Effective Date: {metadata['effective_date']}"))
+        vbox.addWidget(QLabel(f"Department: {metadata['department_name']}"))
+
+        # Tabbed preview by date
+        tab_widget = QTabWidget()
+        from collections import defaultdict
+        import datetime
+        grouped = defaultdict(list)
+        for exam in schedule:
+            grouped[exam.get("date", "N/A")].append(exam)
+        sorted_dates = sorted(grouped.keys(), key=lambda d: d if d == "N/A" else datetime.datetime.strptime(d, "%Y-%m-%d"))
+        for date_str in sorted_dates:
+            exams = grouped[date_str]
+            tab = QWidget()
+            tab_layout = QVBoxLayout(tab)
+            table = QTableWidget()
+            table.setColumnCount(11)
+            table.setHorizontalHeaderLabels([
+                "Semester", "Subject", "Course Code", "Class Section", "Day", "Date", "Time", "Room", "Shift", "Teacher", "Invigilator"
+            ])
+            table.setRowCount(len(exams))
+            for row, e in enumerate(exams):
+                # Day name
+                try:
+                    day_name = datetime.datetime.strptime(date_str, "%Y-%m-%d").strftime("%A")
+                except Exception:
+                    day_name = "N/A"
+                # Time range
+                start_ampm = QTime.fromString(e.get("time", exam_start_time), "HH:mm").toString("hh:mm AP")
+                end_ampm = QTime.fromString(e.get("end_time", exam_end_time), "HH:mm").toString("hh:mm AP")
+                time_range = f"{start_ampm} - {end_ampm}"
+                values = [
+                    e.get("semester", ""),
+                    e.get("subject", ""),
+                    e.get("course_code", ""),
+                    e.get("class_section", ""),
+                    day_name,
+                    date_str,
+                    time_range,
+                    e.get("room", ""),
+                    e.get("shift", ""),
+                    e.get("teacher", ""),
+                    e.get("invigilator", "")
+                ]
+                for col, val in enumerate(values):
+                    table.setItem(row, col, QTableWidgetItem(str(val)))
+            table.resizeColumnsToContents()
+            tab_layout.addWidget(table)
+            tab_widget.addTab(tab, f"{date_str} ({day_name})")
+        vbox.addWidget(tab_widget)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(preview_dialog.accept)
+        vbox.addWidget(close_btn)
+        preview_dialog.exec()
+
+    def show_datesheet_versions_dialog(self):
+        from PyQt6.QtWidgets import QAbstractItemView
+
+        versions = timetable_db.list_schedule_versions("datesheet")
+        if not versions:
+            QMessageBox.information(self, "No Datesheets", "No generated datesheets have been saved yet.")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Saved Datesheets")
+        dialog.resize(750, 400)
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(QLabel("Select one datesheet to open it, or two to compare them."))
+
+        table = QTableWidget(len(versions), 6)
+        table.setHorizontalHeaderLabels(["ID", "Generated", "Title", "Fitness", "Exams", "Seed"])
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        for row, version in enumerate(versions):
+            values = [
+                version["id"], version["created_at"].replace("T", " "), version["label"] or "",
+                "" if version["fitness"] is None else f"{version['fitness']:g}",
+                version["n_assignments"], "" if version["random_seed"] is None else version["random_seed"]
+            ]
+            for col, value in enumerate(values):
+                table.setItem(row, col, QTableWidgetItem(str(value)))
+        layout.addWidget(table)
+
+        def selected_versions():
+            return [versions[row] for row in sorted({index.row() for index in table.selectedIndexes()})]
+
+        def open_version():
+            selected = selected_versions()
+            if len(selected) != 1:
+                QMessageBox.information(dialog, "Open Datesheet", "Select one datesheet to open.")
+                return
+            version = timetable_db.load_schedule_version(selected[0]["id"])
+            params = version["params"]
+            self.show_datesheet_preview(params["metadata"], version["assignments"], params["exam_start_time"], params["exam_end_time"])
+
+        def compare_versions():
+            selected = selected_versions()
+            if len(selected) != 2:
+                QMessageBox.information(dialog, "Compare Datesheets", "Select two datesheets to compare.")
+                return
+            old, new = sorted(selected, key=lambda v: v["id"])
+            summary, details = describe_schedule_diff(
+                timetable_db.diff_schedule_versions(old["id"], new["id"]), time_column=("date", "time")
+            )
+            box = QMessageBox(dialog)
+            box.setWindowTitle("Compare Datesheets")
+            box.setText(f"Datesheet {new['id']} against datesheet {old['id']}:\n{summary}")
+            if details:
+                box.setDetailedText("\n".join(details))
+            box.exec()
+
+        btn_layout = QHBoxLayout()
+        open_btn = QPushButton("Open")
+        compare_btn = QPushButton("Compare")
+        close_btn = QPushButton("Close")
+        btn_layout.addWidget(open_btn)
+        btn_layout.addWidget(compare_btn)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+        open_btn.clicked.connect(open_version)
+        compare_btn.clicked.connect(compare_versions)
+        close_btn.clicked.connect(dialog.accept)
+        dialog.exec()
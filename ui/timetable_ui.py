@@ -2,6 +2,12 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QPushButton, QTabWidget, QInputDialog, QCheckBox, QTableWidgetItem, QComboBox)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont, QColor
+import random
+from db import timetable_db
+from algorithms import timetable_ga
+
+# Item data role holding the placeholder text of a new row's cell until the user edits it
+PLACEHOLDER_ROLE = Qt.ItemDataRole.UserRole + 1
 
 class TimetableWindow(QWidget):
     def __init__(self, back_callback=None):
@@ -164,9 +170,17 @@ class TimetableWindow(QWidget):
                     item.setForeground(Qt.GlobalColor.black)
                 else:
                     item.setForeground(Qt.GlobalColor.gray)
+                    item.setData(PLACEHOLDER_ROLE, text)
                 table.setItem(row_position, col, item)
 
+        def clear_placeholder(item):
+            # An edited cell holds real data from now on
+            if item.data(PLACEHOLDER_ROLE) is not None:
+                item.setData(PLACEHOLDER_ROLE, None)
+                item.setForeground(Qt.GlobalColor.black)
+
         add_row_btn.clicked.connect(add_row)
+        table.itemChanged.connect(clear_placeholder)
         table_header_layout.addWidget(title)
         table_header_layout.addStretch()
         table_header_layout.addWidget(add_row_btn)
@@ -259,6 +273,12 @@ class TimetableWindow(QWidget):
         load_db_btn.setStyleSheet(self.get_button_style("#007bff", min_width="150px"))
         erase_db_btn = QPushButton("Erase All Database Data")
         erase_db_btn.setStyleSheet(self.get_button_style("#dc3545", min_width="200px"))
+        availability_btn = QPushButton("Teacher Availability")
+        availability_btn.setStyleSheet(self.get_button_style("#6f42c1", min_width="160px"))
+        rooms_btn = QPushButton("Rooms && Sections")
+        rooms_btn.setStyleSheet(self.get_button_style("#6f42c1", min_width="160px"))
+        versions_btn = QPushButton("Generated Versions")
+        versions_btn.setStyleSheet(self.get_button_style("#007bff", min_width="170px"))
         generate_btn = QPushButton("Generate Timetable")
         generate_btn.setStyleSheet(self.get_button_style("#17a2b8", min_width="180px"))
         generate_btn.setFont(QFont("Arial", 12, QFont.Weight.Bold))
@@ -268,6 +288,9 @@ class TimetableWindow(QWidget):
         buttons_layout.addWidget(save_db_btn)
         buttons_layout.addWidget(load_db_btn)
         buttons_layout.addWidget(erase_db_btn)
+        buttons_layout.addWidget(availability_btn)
+        buttons_layout.addWidget(rooms_btn)
+        buttons_layout.addWidget(versions_btn)
         buttons_layout.addStretch()
         buttons_layout.addWidget(generate_btn)
 
@@ -277,6 +300,9 @@ class TimetableWindow(QWidget):
         load_db_btn.clicked.connect(self.load_from_db)
         save_db_btn.clicked.connect(self.save_entries_to_db)
         erase_db_btn.clicked.connect(self.erase_all_database_data)
+        availability_btn.clicked.connect(self.show_teacher_availability_dialog)
+        rooms_btn.clicked.connect(self.show_rooms_sections_dialog)
+        versions_btn.clicked.connect(self.show_schedule_versions_dialog)
         generate_btn.clicked.connect(self.show_generate_timetable_dialog)  # Connect here
 
         return buttons_frame
@@ -287,9 +313,6 @@ class TimetableWindow(QWidget):
             QPushButton, QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView, QWidget, QDateEdit
         )
         from PyQt6.QtCore import QTime, QDate
-        import os
-        import sys
-        import importlib.util
         from datetime import datetime
 
         dialog = QDialog(self)
@@ -324,7 +347,7 @@ class TimetableWindow(QWidget):
         # --- Generation Parameters ---
         layout.addWidget(QLabel("<b>Generation Parameters</b>"))
         shift_combo = QComboBox()
-        shift_combo.addItems(["Morning", "Evening"])
+        shift_combo.addItems(["Morning", "Evening", "All Shifts"])
         layout.addWidget(QLabel("Shift:"))
         layout.addWidget(shift_combo)
         lectures_spin = QSpinBox()
@@ -347,6 +370,24 @@ class TimetableWindow(QWidget):
         end_time_edit.setTime(QTime(13, 0))
         layout.addWidget(QLabel("Daily End Time:"))
         layout.addWidget(end_time_edit)
+        # With "All Shifts" the times above apply to the Morning shift and these to the Evening shift
+        evening_start_edit = QTimeEdit()
+        evening_start_edit.setDisplayFormat("hh:mm AP")
+        evening_start_edit.setTime(QTime(13, 0))
+        evening_end_edit = QTimeEdit()
+        evening_end_edit.setDisplayFormat("hh:mm AP")
+        evening_end_edit.setTime(QTime(18, 0))
+        evening_layout = QHBoxLayout()
+        evening_layout.addWidget(QLabel("Evening Start/End (All Shifts):"))
+        evening_layout.addWidget(evening_start_edit)
+        evening_layout.addWidget(evening_end_edit)
+        layout.addLayout(evening_layout)
+        def update_evening_times():
+            all_shifts = shift_combo.currentText() == "All Shifts"
+            evening_start_edit.setEnabled(all_shifts)
+            evening_end_edit.setEnabled(all_shifts)
+        shift_combo.currentTextChanged.connect(update_evening_times)
+        update_evening_times()
 
         # --- Days selection ---
         layout.addWidget(QLabel("Days:"))
@@ -364,17 +405,11 @@ class TimetableWindow(QWidget):
         layout.addWidget(QLabel("Class Section/Semester:"))
         class_section_combo = QComboBox()
         # Fetch from DB
-        db_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db")
-        timetable_db_path = os.path.join(db_dir, "timetable_db.py")
-        spec = importlib.util.spec_from_file_location("timetable_db", timetable_db_path)
-        timetable_db = importlib.util.module_from_spec(spec)
-        sys.modules["timetable_db"] = timetable_db
-        spec.loader.exec_module(timetable_db)
         cur = timetable_db.conn.cursor()
         cur.execute("SELECT DISTINCT semester, name, shift FROM class_sections")
         class_section_list = cur.fetchall()
         def get_class_section_options_for_shift(shift):
-            return [f"{sem} - {name} - {sh}" for sem, name, sh in class_section_list if sh == shift]
+            return [f"{sem} - {name} - {sh}" for sem, name, sh in class_section_list if sh == shift or shift == "All Shifts"]
         class_section_combo.addItems(get_class_section_options_for_shift(shift_combo.currentText()))
         layout.addWidget(class_section_combo)
         def update_class_section_options():
@@ -502,6 +537,96 @@ class TimetableWindow(QWidget):
         layout.addLayout(breaks_layout)
         layout.addWidget(breaks_table)
 
+        # --- Blocked Slots Section ---
+        layout.addWidget(QLabel("<b>Blocked Slots (teacher or room not available)</b>"))
+        blocked_table = QTableWidget(0, 5)
+        blocked_table.setHorizontalHeaderLabels(["Type", "Teacher/Room", "Day", "Start Time", "End Time"])
+        blocked_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        blocked_type_combo = QComboBox()
+        blocked_type_combo.addItems(["Teacher", "Room"])
+        blocked_name_edit = QLineEdit()
+        blocked_name_edit.setPlaceholderText("Teacher name or room number")
+        blocked_day_combo = QComboBox()
+        blocked_day_combo.addItems(days)
+        blocked_start_edit = QTimeEdit()
+        blocked_start_edit.setDisplayFormat("hh:mm AP")
+        blocked_end_edit = QTimeEdit()
+        blocked_end_edit.setDisplayFormat("hh:mm AP")
+        add_blocked_btn = QPushButton("Add Blocked Slot")
+        remove_blocked_btn = QPushButton("Remove Selected Blocked Slot")
+        # Add blocked slot
+        def add_blocked():
+            name = blocked_name_edit.text().strip()
+            if not name:
+                QMessageBox.warning(dialog, "Missing Data", "Please enter a teacher name or room number.")
+                return
+            start = blocked_start_edit.time().toString("hh:mm AP")
+            end = blocked_end_edit.time().toString("hh:mm AP")
+            if datetime.strptime(start, "%I:%M %p") >= datetime.strptime(end, "%I:%M %p"):
+                QMessageBox.warning(dialog, "Invalid Blocked Slot", "Start time must be before end time.")
+                return
+            row = blocked_table.rowCount()
+            blocked_table.insertRow(row)
+            blocked_table.setItem(row, 0, QTableWidgetItem(blocked_type_combo.currentText()))
+            blocked_table.setItem(row, 1, QTableWidgetItem(name))
+            blocked_table.setItem(row, 2, QTableWidgetItem(blocked_day_combo.currentText()))
+            blocked_table.setItem(row, 3, QTableWidgetItem(start))
+            blocked_table.setItem(row, 4, QTableWidgetItem(end))
+        add_blocked_btn.clicked.connect(add_blocked)
+        # Remove blocked slot
+        def remove_blocked():
+            selected = blocked_table.currentRow()
+            if selected >= 0:
+                blocked_table.removeRow(selected)
+        remove_blocked_btn.clicked.connect(remove_blocked)
+        # Layout for blocked slots
+        blocked_layout = QHBoxLayout()
+        blocked_layout.addWidget(blocked_type_combo)
+        blocked_layout.addWidget(blocked_name_edit)
+        blocked_layout.addWidget(blocked_day_combo)
+        blocked_layout.addWidget(blocked_start_edit)
+        blocked_layout.addWidget(blocked_end_edit)
+        blocked_layout.addWidget(add_blocked_btn)
+        blocked_layout.addWidget(remove_blocked_btn)
+        layout.addLayout(blocked_layout)
+        layout.addWidget(blocked_table)
+
+        # --- Generation mode ---
+        layout.addWidget(QLabel("Generation Mode:"))
+        mode_combo = QComboBox()
+        mode_combo.addItem("Full regeneration", "full")
+        mode_combo.addItem("Warm start from the last accepted timetable (keeps unchanged sections)", "warm_start")
+        mode_combo.addItem("Repair only the sections affected by changes to the accepted timetable", "repair")
+        layout.addWidget(mode_combo)
+        # Warm start and repair can also start from an earlier generated version of the shift
+        layout.addWidget(QLabel("Start From:"))
+        start_from_combo = QComboBox()
+        layout.addWidget(start_from_combo)
+        def update_start_from_options():
+            start_from_combo.clear()
+            start_from_combo.addItem("Last accepted timetable", None)
+            if shift_combo.currentText() != "All Shifts":
+                for version in timetable_db.list_schedule_versions("timetable", shift_combo.currentText()):
+                    start_from_combo.addItem(describe_schedule_version(version), version["id"])
+        def update_start_from_enabled():
+            start_from_combo.setEnabled(mode_combo.currentData() != "full")
+        shift_combo.currentTextChanged.connect(update_start_from_options)
+        mode_combo.currentIndexChanged.connect(update_start_from_enabled)
+        update_start_from_options()
+        update_start_from_enabled()
+        # Repair re-optimizes the changed sections plus the sections sharing their teachers or
+        # rooms; each hop spreads one step further, "All" follows the chain to its end
+        layout.addWidget(QLabel("Repair Depth (hops through shared teachers/rooms):"))
+        repair_hops_spin = QSpinBox()
+        repair_hops_spin.setRange(-1, 10)
+        repair_hops_spin.setSpecialValueText("All affected sections")
+        repair_hops_spin.setValue(-1)
+        layout.addWidget(repair_hops_spin)
+        def update_repair_hops_enabled():
+            repair_hops_spin.setEnabled(mode_combo.currentData() == "repair")
+        mode_combo.currentIndexChanged.connect(update_repair_hops_enabled)
+        update_repair_hops_enabled()
+
         # --- Dialog Buttons ---
         btn_layout = QHBoxLayout()
         ok_btn = QPushButton("Generate")
@@ -540,9 +665,36 @@ class TimetableWindow(QWidget):
                 start = breaks_table.item(row, 1).text()
                 end = breaks_table.item(row, 2).text()
                 breaks.append({"day": day, "start": start, "end": end})
+            # Blocked slots
+            blocked_slots = []
+            for row in range(blocked_table.rowCount()):
+                blocked_slots.append({
+                    "type": blocked_table.item(row, 0).text(),
+                    "name": blocked_table.item(row, 1).text(),
+                    "day": blocked_table.item(row, 2).text(),
+                    "start": blocked_table.item(row, 3).text(),
+                    "end": blocked_table.item(row, 4).text()
+                })
 
             # --- Call timetable generation ---
             dialog.accept()
+            if shift == "All Shifts":
+                run_multi_shift_generation(
+                    shift_times={
+                        "Morning": (start_time, end_time),
+                        "Evening": (evening_start_edit.time().toString("hh:mm AP"),
+                                    evening_end_edit.time().toString("hh:mm AP"))
+                    },
+                    lectures_per_course=lectures_per_course,
+                    lecture_duration=lecture_duration,
+                    days=selected_days,
+                    timetable_metadata=meta,
+                    course_exceptions=exceptions,
+                    breaks=breaks,
+                    mode=mode_combo.currentData(),
+                    blocked_slots=blocked_slots
+                )
+                return
             run_timetable_generation(
                 shift=shift,
                 lectures_per_course=lectures_per_course,
@@ -552,18 +704,295 @@ class TimetableWindow(QWidget):
                 days=selected_days,
                 timetable_metadata=meta,
                 course_exceptions=exceptions,
-                breaks=breaks
+                breaks=breaks,
+                mode=mode_combo.currentData(),
+                blocked_slots=blocked_slots,
+                seed_version_id=start_from_combo.currentData(),
+                repair_hops=None if repair_hops_spin.value() < 0 else repair_hops_spin.value()
             )
 
         ok_btn.clicked.connect(on_generate)
         cancel_btn.clicked.connect(dialog.reject)
         dialog.exec()
 
+    def show_teacher_availability_dialog(self):
+        from PyQt6.QtWidgets import (
+            QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QSpinBox, QTimeEdit,
+            QPushButton, QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView
+        )
+        from datetime import datetime
+
+        cur = timetable_db.conn.cursor()
+        cur.execute("SELECT name FROM teachers ORDER BY name")
+        teachers = [row[0] for row in cur.fetchall()]
+        if not teachers:
+            QMessageBox.information(self, "No Teachers", "Save some timetable entries first.")
+            return
+        availability = timetable_db.load_teacher_availability()
+        max_loads = timetable_db.load_teacher_max_daily_load()
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Teacher Availability")
+        dialog.resize(650, 500)
+        layout = QVBoxLayout(dialog)
+
+        teacher_combo = QComboBox()
+        teacher_combo.addItems(teachers)
+        layout.addWidget(QLabel("Teacher:"))
+        layout.addWidget(teacher_combo)
+
+        max_load_spin = QSpinBox()
+        max_load_spin.setRange(0, 10)
+        max_load_spin.setSpecialValueText("Default (3)")
+        layout.addWidget(QLabel("Max Lectures per Day:"))
+        layout.addWidget(max_load_spin)
+
+        layout.addWidget(QLabel(
+            "Windows: if any Available/Preferred windows are given, the teacher is only scheduled inside them; "
+            "Unavailable windows are never used."
+        ))
+        windows_table = QTableWidget(0, 4)
+        windows_table.setHorizontalHeaderLabels(["Status", "Day", "Start Time", "End Time"])
+        windows_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+
+        status_combo = QComboBox()
+        status_combo.addItems(["unavailable", "available", "preferred"])
+        day_combo = QComboBox()
+        day_combo.addItems(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"])
+        start_edit = QTimeEdit()
+        start_edit.setDisplayFormat("hh:mm AP")
+        end_edit = QTimeEdit()
+        end_edit.setDisplayFormat("hh:mm AP")
+        add_window_btn = QPushButton("Add Window")
+        remove_window_btn = QPushButton("Remove Selected Window")
+
+        def add_window_row(window):
+            row = windows_table.rowCount()
+            windows_table.insertRow(row)
+            windows_table.setItem(row, 0, QTableWidgetItem(window["status"]))
+            windows_table.setItem(row, 1, QTableWidgetItem(window["day"]))
+            windows_table.setItem(row, 2, QTableWidgetItem(window["start"]))
+            windows_table.setItem(row, 3, QTableWidgetItem(window["end"]))
+
+        def load_teacher():
+            teacher = teacher_combo.currentText()
+            windows_table.setRowCount(0)
+            for window in availability.get(teacher, []):
+                add_window_row(window)
+            max_load_spin.setValue(max_loads.get(teacher) or 0)
+        teacher_combo.currentTextChanged.connect(load_teacher)
+        load_teacher()
+
+        def add_window():
+            start = start_edit.time().toString("hh:mm AP")
+            end = end_edit.time().toString("hh:mm AP")
+            if datetime.strptime(start, "%I:%M %p") >= datetime.strptime(end, "%I:%M %p"):
+                QMessageBox.warning(dialog, "Invalid Window", "Start time must be before end time.")
+                return
+            add_window_row({"status": status_combo.currentText(), "day": day_combo.currentText(), "start": start, "end": end})
+        add_window_btn.clicked.connect(add_window)
+
+        def remove_window():
+            selected = windows_table.currentRow()
+            if selected >= 0:
+                windows_table.removeRow(selected)
+        remove_window_btn.clicked.connect(remove_window)
+
+        window_layout = QHBoxLayout()
+        window_layout.addWidget(status_combo)
+        window_layout.addWidget(day_combo)
+        window_layout.addWidget(start_edit)
+        window_layout.addWidget(end_edit)
+        window_layout.addWidget(add_window_btn)
+        window_layout.addWidget(remove_window_btn)
+        layout.addLayout(window_layout)
+        layout.addWidget(windows_table)
+
+        def save_teacher():
+            teacher = teacher_combo.currentText()
+            windows = [
+                {
+                    "status": windows_table.item(row, 0).text(),
+                    "day": windows_table.item(row, 1).text(),
+                    "start": windows_table.item(row, 2).text(),
+                    "end": windows_table.item(row, 3).text()
+                }
+                for row in range(windows_table.rowCount())
+            ]
+            max_load = max_load_spin.value() or None
+            if timetable_db.save_teacher_availability(teacher, windows, max_load):
+                availability[teacher] = windows
+                max_loads[teacher] = max_load
+                QMessageBox.information(dialog, "Saved", f"Availability saved for {teacher}.")
+
+        btn_layout = QHBoxLayout()
+        save_btn = QPushButton("Save")
+        close_btn = QPushButton("Close")
+        btn_layout.addWidget(save_btn)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+        save_btn.clicked.connect(save_teacher)
+        close_btn.clicked.connect(dialog.accept)
+        dialog.exec()
+
+    def show_rooms_sections_dialog(self):
+        from PyQt6.QtWidgets import (
+            QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QSpinBox,
+            QPushButton, QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView
+        )
+
+        cur = timetable_db.conn.cursor()
+        cur.execute("SELECT name, capacity, room_type FROM rooms ORDER BY name")
+        rooms = cur.fetchall()
+        cur.execute("SELECT id, semester, name, shift, strength FROM class_sections ORDER BY shift, semester, name")
+        sections = cur.fetchall()
+        if not rooms and not sections:
+            QMessageBox.information(self, "No Data", "Save some timetable entries first.")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Rooms & Sections")
+        dialog.resize(650, 550)
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(QLabel(
+            "Lab courses (\"Lab\" in the Lab column) are placed in lab rooms, other courses in lecture rooms. "
+            "A room is only used for a section it can seat; leave 0 if unknown."
+        ))
+
+        layout.addWidget(QLabel("Rooms:"))
+        rooms_table = QTableWidget(len(rooms), 3)
+        rooms_table.setHorizontalHeaderLabels(["Room", "Type", "Capacity"])
+        rooms_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        for row, (name, capacity, room_type) in enumerate(rooms):
+            item = QTableWidgetItem(str(name))
+            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            rooms_table.setItem(row, 0, item)
+            type_combo = QComboBox()
+            type_combo.addItems(["lecture", "lab"])
+            type_combo.setCurrentText(room_type or "lecture")
+            rooms_table.setCellWidget(row, 1, type_combo)
+            capacity_spin = QSpinBox()
+            capacity_spin.setRange(0, 1000)
+            capacity_spin.setValue(capacity or 0)
+            rooms_table.setCellWidget(row, 2, capacity_spin)
+        layout.addWidget(rooms_table)
+
+        layout.addWidget(QLabel("Class Sections:"))
+        sections_table = QTableWidget(len(sections), 4)
+        sections_table.setHorizontalHeaderLabels(["Semester", "Section", "Shift", "Strength"])
+        sections_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        for row, (section_id, semester, name, shift, strength) in enumerate(sections):
+            for col, value in enumerate((semester, name, shift)):
+                item = QTableWidgetItem(str(value))
+                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                sections_table.setItem(row, col, item)
+            strength_spin = QSpinBox()
+            strength_spin.setRange(0, 1000)
+            strength_spin.setValue(strength or 0)
+            sections_table.setCellWidget(row, 3, strength_spin)
+        layout.addWidget(sections_table)
+
+        def save_all():
+            for row, (name, _, _) in enumerate(rooms):
+                room_type = rooms_table.cellWidget(row, 1).currentText()
+                capacity = rooms_table.cellWidget(row, 2).value() or None
+                if not timetable_db.save_room_info(name, capacity, room_type):
+                    return
+            for row, (section_id, _, _, _, _) in enumerate(sections):
+                strength = sections_table.cellWidget(row, 3).value() or None
+                if not timetable_db.save_section_strength(section_id, strength):
+                    return
+            QMessageBox.information(dialog, "Saved", "Room and section details saved.")
+
+        btn_layout = QHBoxLayout()
+        save_btn = QPushButton("Save")
+        close_btn = QPushButton("Close")
+        btn_layout.addWidget(save_btn)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+        save_btn.clicked.connect(save_all)
+        close_btn.clicked.connect(dialog.accept)
+        dialog.exec()
+
+    def show_schedule_versions_dialog(self):
+        from PyQt6.QtWidgets import (
+            QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QMessageBox,
+            QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+        )
+
+        versions = timetable_db.list_schedule_versions("timetable")
+        if not versions:
+            QMessageBox.information(self, "No Versions", "No generated timetables have been saved yet.")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Generated Timetable Versions")
+        dialog.resize(800, 450)
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(QLabel("Select one version to open it, or two to compare them."))
+
+        table = QTableWidget(len(versions), 7)
+        table.setHorizontalHeaderLabels(["ID", "Generated", "Shift", "Title", "Fitness", "Lectures", "Seed"])
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        for row, version in enumerate(versions):
+            values = [
+                version["id"], version["created_at"].replace("T", " "), version["shift"] or "",
+                version["label"] or "", "" if version["fitness"] is None else f"{version['fitness']:g}",
+                version["n_assignments"], "" if version["random_seed"] is None else version["random_seed"]
+            ]
+            for col, value in enumerate(values):
+                table.setItem(row, col, QTableWidgetItem(str(value)))
+        layout.addWidget(table)
+
+        def selected_versions():
+            return [versions[row] for row in sorted({index.row() for index in table.selectedIndexes()})]
+
+        def open_version():
+            selected = selected_versions()
+            if len(selected) != 1:
+                QMessageBox.information(dialog, "Open Version", "Select one version to open.")
+                return
+            version = selected[0]
+            params = version["params"]
+            time_slots = timetable_ga.generate_time_slots(
+                params["days"], params["start_time"], params["end_time"], params["lecture_duration"],
+                break_duration=10, breaks=params["breaks"]
+            )
+            timetable = timetable_db.load_timetable_version(version["id"])
+            display_title = f"{version['label'] or 'Timetable'} (version {version['id']})"
+            display_timetable(timetable, time_slots, params["days"], params["timetable_metadata"], display_title, shift=version["shift"])
+
+        def compare_versions():
+            selected = selected_versions()
+            if len(selected) != 2:
+                QMessageBox.information(dialog, "Compare Versions", "Select two versions to compare.")
+                return
+            old, new = sorted(selected, key=lambda v: v["id"])
+            summary, details = describe_schedule_diff(timetable_db.diff_schedule_versions(old["id"], new["id"]))
+            box = QMessageBox(dialog)
+            box.setWindowTitle("Compare Versions")
+            box.setText(f"Version {new['id']} against version {old['id']}:\n{summary}")
+            if details:
+                box.setDetailedText("\n".join(details))
+            box.exec()
+
+        btn_layout = QHBoxLayout()
+        open_btn = QPushButton("Open")
+        compare_btn = QPushButton("Compare")
+        close_btn = QPushButton("Close")
+        btn_layout.addWidget(open_btn)
+        btn_layout.addWidget(compare_btn)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+        open_btn.clicked.connect(open_version)
+        compare_btn.clicked.connect(compare_versions)
+        close_btn.clicked.connect(dialog.accept)
+        dialog.exec()
+
     def erase_all_database_data(self):
         from PyQt6.QtWidgets import QMessageBox
-        import sys
-        import os
-        import importlib.util
 
         reply = QMessageBox.question(
             self,
@@ -574,54 +1003,24 @@ class TimetableWindow(QWidget):
         if reply != QMessageBox.StandardButton.Yes:
             return
 
-        # Dynamically import timetable_db
-        db_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db")
-        timetable_db_path = os.path.join(db_dir, "timetable_db.py")
-        spec = importlib.util.spec_from_file_location("timetable_db", timetable_db_path)
-        timetable_db = importlib.util.module_from_spec(spec)
-        sys.modules["timetable_db"] = timetable_db
-        spec.loader.exec_module(timetable_db)
-
-        try:
-            cur = timetable_db.conn.cursor()
-            # Delete all data from all tables (order matters due to foreign keys)
-            cur.execute("DELETE FROM timetable")
-            cur.execute("DELETE FROM courses")
-            cur.execute("DELETE FROM teachers")
-            cur.execute("DELETE FROM rooms")
-            cur.execute("DELETE FROM class_sections")
-            timetable_db.conn.commit()
+        if timetable_db.erase_all_database_data():
             QMessageBox.information(self, "Success", "All data has been erased from the database.")
             # Optionally clear all tabs in the UI
             self.tab_widget.clear()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to erase database data:\n{e}")
+
+    def cell_text(self, table, row, col):
+        """Text of an entry cell; empty for a missing cell or one still showing its placeholder"""
+        item = table.item(row, col)
+        if item is None or item.data(PLACEHOLDER_ROLE) is not None:
+            return ""
+        return item.text()
 
     def save_entries_to_db(self):
-        import sys
-        import os
-        import importlib.util
         from PyQt6.QtWidgets import QMessageBox
 
-        # Dynamically import timetable_db
-        db_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db")
-        timetable_db_path = os.path.join(db_dir, "timetable_db.py")
-        spec = importlib.util.spec_from_file_location("timetable_db", timetable_db_path)
-        timetable_db = importlib.util.module_from_spec(spec)
-        sys.modules["timetable_db"] = timetable_db
-        spec.loader.exec_module(timetable_db)
-
-        # --- Remove all timetable entries before saving new ones ---
-        try:
-            cur = timetable_db.conn.cursor()
-            cur.execute("DELETE FROM timetable")
-            timetable_db.conn.commit()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to clear old timetable entries:\n{e}")
-            return
-
-        total_saved = 0
-        # Loop through all tabs
+        # Collect the rows of all tabs and save them in one transaction (previous entries replaced)
+        entries = []
+        row_items = []
         for tab_index in range(self.tab_widget.count()):
             tab_widget = self.tab_widget.widget(tab_index)
             if not hasattr(tab_widget, "table"):
@@ -629,50 +1028,31 @@ class TimetableWindow(QWidget):
             table = tab_widget.table
             for row in range(table.rowCount()):
                 shift_combo = table.cellWidget(row, 2)
-                shift = shift_combo.currentText() if shift_combo else ""
-                semester = table.item(row, 3).text() if table.item(row, 3) else ""
-                class_section = table.item(row, 4).text() if table.item(row, 4) else ""
-                room = table.item(row, 5).text() if table.item(row, 5) else ""
-                teacher = table.item(row, 6).text() if table.item(row, 6) else ""
-                course_code = table.item(row, 7).text() if table.item(row, 7) else ""
-                course_name = table.item(row, 8).text() if table.item(row, 8) else ""
-                indicators = table.item(row, 9).text() if table.item(row, 9) else ""
-
-                # Use timetable_db helper to get or create IDs
-                teacher_id = timetable_db.fetch_id_from_name("teachers", teacher)
-                if not teacher_id:
-                    continue
-                course_id = timetable_db.fetch_id_from_name("courses", course_name, teacher_id=teacher_id, code=course_code, indicators=indicators)
-                if not course_id:
-                    continue
-                # --- Update indicators (Lab) if course already exists ---
-                try:
-                    cur.execute(
-                        "UPDATE courses SET indicators = ? WHERE id = ?",
-                        (indicators, course_id)
-                    )
-                    timetable_db.conn.commit()
-                except Exception:
-                    pass
-                # --- End update indicators ---
-                room_id = timetable_db.fetch_id_from_name("rooms", room)
-                if not room_id:
-                    continue
-                class_section_id = timetable_db.fetch_id_from_name("class_sections", class_section, semester=semester, shift=shift)
-                if not class_section_id:
-                    continue
-
-                # Insert into timetable table
-                try:
-                    cur.execute(
-                        "INSERT INTO timetable (teacher_id, course_id, room_id, class_section_id, semester, shift) VALUES (?, ?, ?, ?, ?, ?)",
-                        (teacher_id, course_id, room_id, class_section_id, semester, shift)
-                    )
-                    timetable_db.conn.commit()
-                    total_saved += 1
-                except Exception as e:
-                    QMessageBox.critical(self, "Error", f"Failed to save entry on tab {tab_index+1}, row {row+1}:\n{e}")
-                    return
+                entries.append({
+                    "shift": shift_combo.currentText() if shift_combo else "",
+                    "semester": self.cell_text(table, row, 3),
+                    "class_section": self.cell_text(table, row, 4),
+                    "room": self.cell_text(table, row, 5),
+                    "teacher": self.cell_text(table, row, 6),
+                    "course_code": self.cell_text(table, row, 7),
+                    "course_name": self.cell_text(table, row, 8),
+                    "indicators": self.cell_text(table, row, 9)
+                })
+                row_items.append(table.item(row, 1))
+
+        result = timetable_db.save_timetable_entries(entries)
+        if result is None:
+            return
+        # The saved rows were replaced, so the rows now carry the new IDs (none if skipped)
+        for entry, row_item in zip(entries, row_items):
+            if row_item:
+                row_item.setData(Qt.ItemDataRole.UserRole, entry.get("entry_id"))
+        total_saved, skipped = result
+        if skipped:
+            QMessageBox.warning(
+                self, "Invalid Entries",
+                f"{skipped} entries were skipped: rooms must be positive integers and course code, semester and shift are required."
+            )
 
         if total_saved == 0:
             QMessageBox.warning(self, "No Data", "There are no entries to save.")
@@ -680,9 +1060,6 @@ class TimetableWindow(QWidget):
             QMessageBox.information(self, "Success", f"All entries from all semesters saved to the database (previous entries replaced).")
 
     def load_from_db(self):
-        import sys
-        import os
-        import importlib.util
         from PyQt6.QtWidgets import QInputDialog, QMessageBox
 
         # Ask user which shift to load
@@ -697,16 +1074,6 @@ class TimetableWindow(QWidget):
         if not ok:
             return
 
-        # Build the path to timetable_db.py
-        db_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db")
-        timetable_db_path = os.path.join(db_dir, "timetable_db.py")
-
-        # Dynamically import timetable_db
-        spec = importlib.util.spec_from_file_location("timetable_db", timetable_db_path)
-        timetable_db = importlib.util.module_from_spec(spec)
-        sys.modules["timetable_db"] = timetable_db
-        spec.loader.exec_module(timetable_db)
-
         # Clear all tabs first
         self.tab_widget.clear()
 
@@ -751,10 +1118,11 @@ class TimetableWindow(QWidget):
                 layout.setContentsMargins(0,0,0,0)
                 table.setCellWidget(row_position, 0, cell_widget_container)
 
-                # Row number
+                # Row number, carrying the database ID of the entry
                 row_num_item = QTableWidgetItem(str(row_position + 1))
                 row_num_item.setFlags(row_num_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
                 row_num_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                row_num_item.setData(Qt.ItemDataRole.UserRole, entry['entry_id'])
                 table.setItem(row_position, 1, row_num_item)
 
                 # Shift
@@ -802,9 +1170,6 @@ class TimetableWindow(QWidget):
 
     def delete_selected_entries(self):
         from PyQt6.QtWidgets import QMessageBox
-        import sys
-        import os
-        import importlib.util
 
         table = self.get_current_table()
         if not table:
@@ -812,24 +1177,18 @@ class TimetableWindow(QWidget):
 
         # Collect rows with checked checkboxes in column 0
         rows_to_delete = []
-        entries_to_delete = []
+        ids_to_delete = []
         for row in range(table.rowCount()):
             cell_widget = table.cellWidget(row, 0)
             if cell_widget:
                 checkbox = cell_widget.findChild(QCheckBox)
                 if checkbox and checkbox.isChecked():
                     rows_to_delete.append(row)
-                    # Collect entry data for database deletion
-                    entry = {
-                        'shift': table.cellWidget(row, 2).currentText(),
-                        'semester': table.item(row, 3).text(),
-                        'class_section': table.item(row, 4).text(),
-                        'room': table.item(row, 5).text(),
-                        'teacher': table.item(row, 6).text(),
-                        'course_code': table.item(row, 7).text(),
-                        'course_name': table.item(row, 8).text()
-                    }
-                    entries_to_delete.append(entry)
+                    # Rows loaded from or saved to the database carry their entry ID;
+                    # rows that were never saved have none and only exist in the UI
+                    entry_id = table.item(row, 1).data(Qt.ItemDataRole.UserRole) if table.item(row, 1) else None
+                    if entry_id is not None:
+                        ids_to_delete.append(entry_id)
 
         if not rows_to_delete:
             QMessageBox.information(self, "No Selection", "Please select entries to delete.")
@@ -852,51 +1211,10 @@ class TimetableWindow(QWidget):
             return
 
         # Delete from database if user chose Yes
-        if reply == QMessageBox.StandardButton.Yes:
+        if reply == QMessageBox.StandardButton.Yes and ids_to_delete:
             try:
-                # Dynamically import timetable_db
-                db_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db")
-                timetable_db_path = os.path.join(db_dir, "timetable_db.py")
-                spec = importlib.util.spec_from_file_location("timetable_db", timetable_db_path)
-                timetable_db = importlib.util.module_from_spec(spec)
-                sys.modules["timetable_db"] = timetable_db
-                spec.loader.exec_module(timetable_db)
-
-                cur = timetable_db.conn.cursor()
-                for entry in entries_to_delete:
-                    # Find and delete the matching timetable entry
-                    cur.execute("""
-                        DELETE FROM timetable 
-                        WHERE class_section_id IN (
-                            SELECT cs.id 
-                            FROM class_sections cs 
-                            WHERE cs.name = ? AND cs.semester = ? AND cs.shift = ?
-                        )
-                        AND room_id IN (
-                            SELECT r.id 
-                            FROM rooms r 
-                            WHERE r.name = ?
-                        )
-                        AND teacher_id IN (
-                            SELECT t.id 
-                            FROM teachers t 
-                            WHERE t.name = ?
-                        )
-                        AND course_id IN (
-                            SELECT c.id 
-                            FROM courses c 
-                            WHERE c.code = ? AND c.name = ?
-                        )
-                    """, (
-                        entry['class_section'],
-                        entry['semester'],
-                        entry['shift'],
-                        entry['room'],
-                        entry['teacher'],
-                        entry['course_code'],
-                        entry['course_name']
-                    ))
-                timetable_db.conn.commit()
+                if timetable_db.delete_timetable_entries(ids_to_delete) is None:
+                    return
                 QMessageBox.information(self, "Success", "Selected entries deleted from database.")
             except Exception as e:
                 QMessageBox.critical(self, "Database Error", f"Failed to delete from database: {e}")
@@ -918,54 +1236,111 @@ class TimetableWindow(QWidget):
             return
         table.setRowCount(0)
 
+def build_ga_entries(db_rows):
+    """Convert GARow namedtuples from timetable_db.stream_timetable_for_ga into GA entries"""
+    return [
+        {
+            "course_name": r.course_name,
+            "course_code": r.course_code,
+            "course_indicators": r.course_indicators or "",
+            "class_section": r.class_section_name,
+            "room": str(r.room_name),
+            "teacher": r.teacher_name,
+            "semester": r.semester,
+            "section_size": r.section_strength
+        }
+        for r in db_rows
+    ]
+
+def compile_blocked_slots(timetable_ga, time_slots, blocked_slots):
+    """Turn blocked teacher/room windows from the generate dialog into (teacher, room) blocked slot dicts"""
+    teacher_blocked_slots = {}
+    room_blocked_slots = {}
+    for blocked in blocked_slots or []:
+        target = teacher_blocked_slots if blocked["type"] == "Teacher" else room_blocked_slots
+        target.setdefault(blocked["name"], set()).update(
+            timetable_ga.slots_in_window(time_slots, blocked["day"], blocked["start"], blocked["end"])
+        )
+    return teacher_blocked_slots, room_blocked_slots
+
+def generation_params(lectures_per_course, lecture_duration, start_time, end_time, days, timetable_metadata,
+                      course_exceptions=None, breaks=None, mode="full", blocked_slots=None, seed_version_id=None,
+                      repair_hops=None):
+    """Generation settings stored with a saved timetable version; enough to rebuild its time slots and display it"""
+    return {
+        "lectures_per_course": lectures_per_course,
+        "lecture_duration": lecture_duration,
+        "start_time": start_time,
+        "end_time": end_time,
+        "days": days,
+        "timetable_metadata": timetable_metadata,
+        "course_exceptions": course_exceptions or {},
+        "breaks": breaks or [],
+        "mode": mode,
+        "blocked_slots": blocked_slots or [],
+        "seed_version_id": seed_version_id,
+        "repair_hops": repair_hops
+    }
+
+def describe_schedule_version(version):
+    """One-line description of a saved version for lists and combo boxes"""
+    fitness = "" if version["fitness"] is None else f", fitness {version['fitness']:g}"
+    return f"#{version['id']} {version['created_at'].replace('T', ' ')} - {version['label'] or version['shift'] or ''}{fitness}"
+
+def describe_schedule_diff(diff, time_column="time_slot"):
+    """
+    Summary line and detail lines of a timetable_db.diff_schedule_versions result.
+    time_column names the assignment's time, or is a tuple of columns shown together
+    (e.g. ("date", "time") for datesheets).
+    """
+    time_columns = (time_column,) if isinstance(time_column, str) else time_column
+    def name(a):
+        return f"{a['semester']} {a['class_section']} {a['course_code']}"
+    def place(a):
+        return f"{' '.join(str(a[c]) for c in time_columns)} room {a['room']} ({a['teacher']})"
+    summary = (f"{len(diff['changed'])} moved, {len(diff['added'])} added, "
+               f"{len(diff['removed'])} removed, {diff['unchanged']} unchanged")
+    details = [f"Moved: {name(old)}: {place(old)} -> {place(new)}" for old, new in diff['changed']]
+    details += [f"Added: {name(a)}: {place(a)}" for a in diff['added']]
+    details += [f"Removed: {name(a)}: {place(a)}" for a in diff['removed']]
+    return summary, details
+
+def report_invalid_pins(shift, invalid_pins):
+    """Tell the user which pinned lectures are ignored because they break a blocked slot or availability"""
+    if not invalid_pins:
+        return
+    from PyQt6.QtWidgets import QMessageBox
+    lines = [
+        f"{pin['course_name']} ({pin['semester']} {pin['class_section']}) at {pin['time_slot']}: {reason}"
+        for pin, reason in invalid_pins
+    ]
+    box = QMessageBox()
+    box.setIcon(QMessageBox.Icon.Warning)
+    box.setWindowTitle("Pinned Lectures Ignored")
+    box.setText(f"{len(invalid_pins)} pinned lectures of the {shift} shift break a constraint and will not be kept.")
+    box.setDetailedText("\n".join(lines))
+    box.exec()
+
 def run_timetable_generation(
     shift, lectures_per_course, lecture_duration, start_time,
-    end_time, days, timetable_metadata, course_exceptions=None, breaks=None
+    end_time, days, timetable_metadata, course_exceptions=None, breaks=None,
+    mode="full", blocked_slots=None, seed_version_id=None, repair_hops=None
 ):
+    """
+    Generate the timetable of one shift, save it as a new version and display it.
+    Warm start and repair start from the saved version seed_version_id if given,
+    otherwise from the shift's last accepted timetable. repair_hops caps the repaired
+    neighbourhood (None: every transitively affected section).
+    """
     try:
-        import os
-        import sys
-        import importlib.util
         from PyQt6.QtWidgets import QMessageBox
 
-        # --- Dynamically import timetable_db ---
-        db_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db")
-        timetable_db_path = os.path.join(db_dir, "timetable_db.py")
-        spec = importlib.util.spec_from_file_location("timetable_db", timetable_db_path)
-        timetable_db = importlib.util.module_from_spec(spec)
-        sys.modules["timetable_db"] = timetable_db
-        spec.loader.exec_module(timetable_db)
-
-        # --- Dynamically import timetable_ga ---
-        algo_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "algorithm")
-        ga_path = os.path.join(algo_dir, "timetable_ga.py")
-        spec_ga = importlib.util.spec_from_file_location("timetable_ga", ga_path)
-        timetable_ga = importlib.util.module_from_spec(spec_ga)
-        sys.modules["timetable_ga"] = timetable_ga
-        spec_ga.loader.exec_module(timetable_ga)
-
         print(f"Loading GA data for Shift: {shift}")
-        db_rows_for_ga = timetable_db.load_timetable_for_ga(shift=shift)
-
-        if not db_rows_for_ga:
-            QMessageBox.warning(None, "No Data for GA", f"No timetable entries found in the database for Shift: {shift} to generate a timetable.")
-            return
-
-        ga_entries = [
-            {
-                "course_name": r["course_name"],
-                "course_code": r["course_code"],
-                "course_indicators": r.get("course_indicators", ""),
-                "class_section": r["class_section_name"],
-                "room": str(r["room_name"]),
-                "teacher": r["teacher_name"],
-                "semester": r["semester"]
-            }
-            for r in db_rows_for_ga
-        ]
+        # GA entries are built as the rows stream in, without a list of row dicts in between
+        ga_entries = build_ga_entries(timetable_db.stream_timetable_for_ga(shift, row_format="namedtuple"))
 
         if not ga_entries:
-            QMessageBox.warning(None, "Processing Error", "Failed to prepare entries for the Genetic Algorithm.")
+            QMessageBox.warning(None, "No Data for GA", f"No timetable entries found in the database for Shift: {shift} to generate a timetable.")
             return
 
         time_slots = timetable_ga.generate_time_slots(
@@ -977,17 +1352,61 @@ def run_timetable_generation(
             QMessageBox.warning(None, "Configuration Error", "Could not generate any valid time slots. Check start/end times and duration.")
             return
 
-        ga = timetable_ga.TimetableGeneticAlgorithm(
-            entries=ga_entries,
-            time_slots_input=time_slots,
-            lectures_per_course=lectures_per_course,
-            course_exceptions=course_exceptions,
-            population_size=100,
-            max_generations=100,
-            mutation_rate=0.15
-        )
-
-        optimized_schedule, best_fitness = ga.evolve()
+        # Blocked teacher/room windows become blocked slots; pins come from the last accepted timetable
+        teacher_blocked_slots, room_blocked_slots = compile_blocked_slots(timetable_ga, time_slots, blocked_slots)
+        pinned_lectures = timetable_db.load_pinned_lectures(shift)
+        teacher_availability = timetable_db.load_teacher_availability()
+        teacher_max_daily_load = timetable_db.load_teacher_max_daily_load()
+        room_info = timetable_db.load_room_info()
+        report_invalid_pins(shift, timetable_ga.find_invalid_pins(
+            pinned_lectures, ga_entries, time_slots, teacher_blocked_slots, room_blocked_slots, teacher_availability
+        ))
+
+        seed_timetable = None
+        if mode in ("warm_start", "repair"):
+            if seed_version_id is not None:
+                seed_timetable = timetable_db.load_timetable_version(seed_version_id)
+            else:
+                seed_timetable = timetable_db.load_accepted_timetable(shift)
+            if not seed_timetable:
+                QMessageBox.information(None, "No Accepted Timetable", f"No timetable to start from found for Shift: {shift}. Generating from scratch.")
+        random_seed = random.randrange(2**31)
+
+        if mode == "repair" and seed_timetable:
+            optimized_schedule, best_fitness = timetable_ga.repair_timetable(
+                entries=ga_entries,
+                time_slots=time_slots,
+                lectures_per_course=lectures_per_course,
+                existing_timetable=seed_timetable,
+                course_exceptions=course_exceptions,
+                max_hops=repair_hops,
+                pinned_lectures=pinned_lectures,
+                teacher_blocked_slots=teacher_blocked_slots,
+                room_blocked_slots=room_blocked_slots,
+                teacher_availability=teacher_availability,
+                teacher_max_daily_load=teacher_max_daily_load,
+                room_info=room_info,
+                random_seed=random_seed
+            )
+        else:
+            # Independent groups of sections (no shared teachers/rooms) are solved in parallel
+            optimized_schedule, best_fitness = timetable_ga.solve_decomposed(
+                entries=ga_entries,
+                time_slots_input=time_slots,
+                lectures_per_course=lectures_per_course,
+                course_exceptions=course_exceptions,
+                population_size=100,
+                max_generations=100,
+                mutation_rate=0.15,
+                seed_timetable=seed_timetable,
+                pinned_lectures=pinned_lectures,
+                teacher_blocked_slots=teacher_blocked_slots,
+                room_blocked_slots=room_blocked_slots,
+                teacher_availability=teacher_availability,
+                teacher_max_daily_load=teacher_max_daily_load,
+                room_info=room_info,
+                random_seed=random_seed
+            )
 
         print(f"Debug: GA returned optimized schedule with fitness: {best_fitness}")
         print(f"Debug: Optimized schedule contains {len(optimized_schedule or {})} lecture entries")
@@ -997,7 +1416,14 @@ def run_timetable_generation(
             return
 
         display_title = f"{timetable_metadata['timetable_title']} - {shift} Shift"
-        display_timetable(optimized_schedule, time_slots, days, timetable_metadata, display_title)
+        timetable_db.save_schedule_version(
+            "timetable", optimized_schedule.values(),
+            generation_params(lectures_per_course, lecture_duration, start_time, end_time, days,
+                              timetable_metadata, course_exceptions, breaks, mode, blocked_slots, seed_version_id,
+                              repair_hops),
+            random_seed=random_seed, fitness=best_fitness, shift=shift, label=display_title
+        )
+        display_timetable(optimized_schedule, time_slots, days, timetable_metadata, display_title, shift=shift)
 
     except Exception as ex:
         from PyQt6.QtWidgets import QMessageBox
@@ -1005,8 +1431,89 @@ def run_timetable_generation(
         import traceback
         traceback.print_exc()
 
+def run_multi_shift_generation(
+    shift_times, lectures_per_course, lecture_duration, days, timetable_metadata,
+    course_exceptions=None, breaks=None, mode="full", blocked_slots=None
+):
+    """
+    Generate the timetables of all shifts together so teachers working in more than one
+    shift get no overlapping lectures or excess daily load. shift_times: {shift: (start, end)}.
+    Repair mode is not available here; any mode other than "full" warm-starts each shift.
+    """
+    try:
+        from PyQt6.QtWidgets import QMessageBox
+
+        rows_by_shift = timetable_db.load_timetable_for_ga_by_shift(row_format="namedtuple")
+        if not rows_by_shift:
+            QMessageBox.warning(None, "No Data for GA", "No timetable entries found in the database to generate a timetable.")
+            return
+
+        teacher_availability = timetable_db.load_teacher_availability()
+        teacher_max_daily_load = timetable_db.load_teacher_max_daily_load()
+        room_info = timetable_db.load_room_info()
+
+        shift_options = {}
+        shift_slots = {}
+        for shift, (start_time, end_time) in shift_times.items():
+            if shift not in rows_by_shift:
+                continue
+            time_slots = timetable_ga.generate_time_slots(
+                days, start_time, end_time, lecture_duration, break_duration=10, breaks=breaks
+            )
+            if not time_slots:
+                QMessageBox.warning(None, "Configuration Error", f"Could not generate any valid time slots for the {shift} shift.")
+                return
+            teacher_blocked_slots, room_blocked_slots = compile_blocked_slots(timetable_ga, time_slots, blocked_slots)
+            seed_timetable = timetable_db.load_accepted_timetable(shift) if mode != "full" else None
+            entries = build_ga_entries(rows_by_shift[shift])
+            pinned_lectures = timetable_db.load_pinned_lectures(shift)
+            report_invalid_pins(shift, timetable_ga.find_invalid_pins(
+                pinned_lectures, entries, time_slots, teacher_blocked_slots, room_blocked_slots, teacher_availability
+            ))
+            shift_slots[shift] = time_slots
+            shift_options[shift] = dict(
+                entries=entries,
+                time_slots_input=time_slots,
+                lectures_per_course=lectures_per_course,
+                course_exceptions=course_exceptions,
+                population_size=100,
+                max_generations=100,
+                mutation_rate=0.15,
+                seed_timetable=seed_timetable,
+                pinned_lectures=pinned_lectures,
+                teacher_blocked_slots=teacher_blocked_slots,
+                room_blocked_slots=room_blocked_slots,
+                teacher_availability=teacher_availability,
+                teacher_max_daily_load=teacher_max_daily_load,
+                room_info=room_info,
+                random_seed=random.randrange(2**31)
+            )
+
+        results = timetable_ga.optimize_shifts(shift_options)
+
+        for shift, (optimized_schedule, best_fitness) in results.items():
+            print(f"Debug: GA returned {len(optimized_schedule or {})} lectures for shift {shift} with fitness: {best_fitness}")
+            if not optimized_schedule:
+                QMessageBox.warning(None, "Generation Failed", f"The genetic algorithm could not generate a timetable for the {shift} shift.")
+                continue
+            display_title = f"{timetable_metadata['timetable_title']} - {shift} Shift"
+            start_time, end_time = shift_times[shift]
+            timetable_db.save_schedule_version(
+                "timetable", optimized_schedule.values(),
+                generation_params(lectures_per_course, lecture_duration, start_time, end_time, days,
+                                  timetable_metadata, course_exceptions, breaks, mode, blocked_slots),
+                random_seed=shift_options[shift]["random_seed"], fitness=best_fitness, shift=shift, label=display_title
+            )
+            display_timetable(optimized_schedule, shift_slots[shift], days, timetable_metadata, display_title, shift=shift)
+
+    except Exception as ex:
+        from PyQt6.QtWidgets import QMessageBox
+        QMessageBox.critical(None, "Timetable Generation Error", f"Failed to generate timetables: {ex}")
+        import traceback
+        traceback.print_exc()
+
 def display_timetable(optimized_timetable_data, available_time_slots,
-                      scheduled_days, timetable_metadata, display_title):
+                      scheduled_days, timetable_metadata, display_title, shift=None):
     from PyQt6.QtWidgets import (
         QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTabWidget, QWidget, QTableWidget, QTableWidgetItem,
         QPushButton, QMessageBox, QHeaderView, QFileDialog
@@ -1089,13 +1596,15 @@ def display_timetable(optimized_timetable_data, available_time_slots,
             if conflict:
                 QMessageBox.warning(dialog, "Conflict Detected", f"Cannot swap:\n{msg}")
                 return
-        # Swap time_slot in details
+        # Swap time_slot in details; manually placed lectures are pinned for the next generation
         if ld1:
             ld1 = ld1.copy()
             ld1["time_slot"] = f"{cell2.day} {cell2.time_slot}"
+            ld1["pinned"] = True
         if ld2:
             ld2 = ld2.copy()
             ld2["time_slot"] = f"{cell1.day} {cell1.time_slot}"
+            ld2["pinned"] = True
         # Assign new details
         if ld2:
             create_cell_content(cell1, ld2)
@@ -1121,6 +1630,8 @@ def display_timetable(optimized_timetable_data, available_time_slots,
 
     def create_cell_content(cell, lecture_details):
         cell_text = f"{lecture_details['course_name']}\n({lecture_details['course_code']})\n{lecture_details.get('course_indicators','')}\n{lecture_details['teacher']}\nR: {lecture_details['room']}"
+        if lecture_details.get("pinned"):
+            cell_text += "\n[Pinned]"
         cell.setText(cell_text)
         cell.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
         cell.lecture_details = lecture_details
@@ -1204,9 +1715,14 @@ def display_timetable(optimized_timetable_data, available_time_slots,
     btn_layout = QHBoxLayout()
     export_pdf_btn = QPushButton("Export to PDF")
     export_excel_btn = QPushButton("Export to Excel")
+    pin_btn = QPushButton("Pin/Unpin Selected")
+    accept_btn = QPushButton("Accept Timetable")
+    accept_btn.setEnabled(shift is not None)
     close_btn = QPushButton("Close")
     btn_layout.addWidget(export_pdf_btn)
     btn_layout.addWidget(export_excel_btn)
+    btn_layout.addWidget(pin_btn)
+    btn_layout.addWidget(accept_btn)
     btn_layout.addStretch()
     btn_layout.addWidget(close_btn)
     layout.addLayout(btn_layout)
@@ -1228,7 +1744,6 @@ def display_timetable(optimized_timetable_data, available_time_slots,
     def export_to_pdf(optimized_timetable_data, time_slots_cols, grouped_display_data, metadata, title):
         try:
             from PyQt6.QtWidgets import QFileDialog, QMessageBox
-            import os
 
             # Try to import reportlab
             try:
@@ -1346,7 +1861,6 @@ def display_timetable(optimized_timetable_data, available_time_slots,
     def export_to_excel_generated(current_timetable, available_time_slots, grouped_display_data, metadata, title):
         try:
             from PyQt6.QtWidgets import QFileDialog, QMessageBox
-            import os
 
             # Try to import pandas and xlsxwriter
             try:
@@ -1414,6 +1928,25 @@ def display_timetable(optimized_timetable_data, available_time_slots,
             import traceback
             traceback.print_exc()
 
+    def accept_timetable():
+
+        # Save the timetable as currently shown, including manual swaps and pins
+        pinned = [details for details in current_timetable.values() if details.get("pinned")]
+        if (timetable_db.save_accepted_timetable(shift, current_timetable.values())
+                and timetable_db.save_pinned_lectures(shift, pinned)):
+            QMessageBox.information(dialog, "Timetable Accepted", f"Timetable saved as the accepted timetable for the {shift} shift ({len(pinned)} pinned lectures).")
+
+    def toggle_pin():
+        cell = selected_cell["widget"]
+        if cell is None:
+            QMessageBox.information(dialog, "No Selection", "Select a lecture to pin or unpin.")
+            return
+        details = current_timetable.get((cell.semester, cell.section, cell.day, cell.time_slot))
+        if details:
+            details["pinned"] = not details.get("pinned", False)
+            create_cell_content(cell, details)
+        deselect_cell()
+
     export_pdf_btn.clicked.connect(lambda: export_to_pdf(
         current_timetable, available_time_slots, build_sem_sec_groups_from_current(),
         timetable_metadata, display_title
@@ -1422,6 +1955,8 @@ def display_timetable(optimized_timetable_data, available_time_slots,
         current_timetable, available_time_slots, build_sem_sec_groups_from_current(),
         timetable_metadata, display_title
     ))
+    pin_btn.clicked.connect(toggle_pin)
+    accept_btn.clicked.connect(accept_timetable)
     close_btn.clicked.connect(dialog.close)
 
     dialog.exec()